@@ -41,7 +41,7 @@ sys.path.insert(0, str(SCRIPT_DIR))
 
 from config.config_loader import Config
 from hosts_manager import HostsManager
-from shared_state import _shared_state
+from shared_state import get_shared_state
 from web.web_terminal import WebTerminalServer
 
 # Import tool modules
@@ -88,7 +88,7 @@ class RemoteTerminalMCP:
 
     def __init__(self):
         # Get the singleton shared state instance
-        self._shared_state = _shared_state
+        self._shared_state = get_shared_state()
         
         # Initialize config files (copy defaults on first run)
         from config.config_init import ensure_config_files
@@ -118,6 +118,10 @@ class RemoteTerminalMCP:
         
         # Initialize web terminal server (pass hosts_manager for connection display)
         self.web_server = WebTerminalServer(self._shared_state, self.config, self.hosts_manager)
+
+        # Attach it to shared state so transfer progress reaches the browser
+        # (thread-safe scheduling and throttling live in shared_state_transfer)
+        self._shared_state.web_server = self.web_server
         
         # Web server will start on first server connection
         # self.web_server.start()  # Removed - don't auto-open
@@ -220,6 +224,10 @@ class RemoteTerminalMCP:
         
         if self._shared_state.ssh_manager:
             self._shared_state.ssh_manager.disconnect()
+
+        # Close idle connections kept for server switching
+        from ssh.ssh_pool import SSHConnectionPool
+        SSHConnectionPool.close_all()
     
     async def run(self):
         """Run the MCP server"""
@@ -57,13 +57,15 @@ class OutputBuffer:
         new_lines = []
         self.current_output += text
 
-        # Process complete lines
-        while '\n' in self.current_output:
-            line_text, self.current_output = self.current_output.split('\n', 1)
-            line = OutputLine(line_text)
-            self.lines.append(line)
-            self.total_lines_added += 1  # Track total lines added
-            new_lines.append(line)
+        # Process complete lines - one split, so a chunk carrying many lines
+        # is not re-copied once per line
+        if '\n' in self.current_output:
+            *complete, self.current_output = self.current_output.split('\n')
+            for line_text in complete:
+                line = OutputLine(line_text)
+                self.lines.append(line)
+                new_lines.append(line)
+            self.total_lines_added += len(complete)  # Track total lines added
 
         return new_lines
 
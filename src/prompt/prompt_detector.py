@@ -130,32 +130,6 @@ class PromptDetector:
         """
         return self._pattern_manager.is_background_command(command)
 
-    def detect_pager_old(self, buffer) -> Tuple[bool, str]:
-        """
-        Check if output contains pager indicators
-
-        CRITICAL: Patterns designed to NOT match:
-        - Shell prompts (user@host:~$)
-        - Password prompts ([sudo] password:)
-
-        Returns:
-            (detected, pager_type) tuple
-        """
-        return self._pager_detector.detect_pager_old(buffer)
-
-    def detect_pager_old1(self, buffer) -> Tuple[bool, str, str]:
-        """
-        Check if output contains pager indicators
-
-        Returns:
-            (detected, pager_type, action) tuple
-            - detected: True if pager found
-            - pager_type: Type of pager
-            - action: "continue" (send Space), "quit" (send q), "none"
-        """
-        return self._pager_detector.detect_pager_old1(buffer)
-
-
     def detect_pager(self, buffer) -> Tuple[bool, str, str]:
         """
         Check if output contains pager indicators
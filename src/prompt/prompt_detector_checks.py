@@ -4,10 +4,16 @@ Command completion detection and verification
 """
 
 import logging
-from typing import Tuple
+from itertools import islice
+from typing import Any, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Shortest plausible prompt ("$ ", "# ") and characters every supported prompt
+# ends in or contains; partial lines failing this cannot match a prompt pattern
+_MIN_PROMPT_LEN = 2
+_PROMPT_HINT_CHARS = ('@', '$', '#', '>', '%')
+
 
 class PromptChecker:
     """Handles prompt detection and verification logic"""
@@ -68,7 +74,7 @@ class PromptChecker:
         lines_after = len(buffer.buffer.lines)
         if lines_after > lines_before:
             # Check last few lines for prompt
-            recent_lines = buffer.get_last_n(3)
+            recent_lines = self._tail(buffer.buffer.lines, 3)
             for line in recent_lines:
                 detected, reason = self.pattern_manager.detect_prompt_in_line(line.text, prompt_pattern)
                 if detected is True:
@@ -76,6 +82,22 @@ class PromptChecker:
 
         return False, "verification_failed"
 
+    @staticmethod
+    def _tail(lines, n: int) -> Tuple[Any, ...]:
+        """
+        Get the last n lines without copying the whole buffer
+
+        Args:
+            lines: Line deque (or any reversible sequence)
+            n: Number of trailing lines to return
+
+        Returns:
+            Tuple of the last n lines in original order
+        """
+        if n <= 0:
+            return ()
+        return tuple(islice(reversed(lines), n))[::-1]
+
     async def check_completion(self, buffer, prompt_pattern: str) -> Tuple[bool, str]:
         """
         Check completion with clear priority order:
@@ -142,7 +164,11 @@ class PromptChecker:
             if self.debug_logging:
                 logger.info(f"[PROMPT CHECK] current_output: {repr(current)}")
 
-            if current:
+            if current and (len(current) < _MIN_PROMPT_LEN
+                            or not any(c in current for c in _PROMPT_HINT_CHARS)):
+                # Cheap reject: partial output that cannot hold a prompt
+                self._last_non_match = current
+            elif current:
                 detected, reason = self.pattern_manager.detect_prompt_in_line(current, prompt_pattern)
 
                 if self.debug_logging:
@@ -186,12 +212,8 @@ class PromptChecker:
                 logger.info(f"[PROMPT CHECK] No completed output lines yet (start={start_checking_from}, total={total_lines})")
             return False, "no_output_yet"
 
-        # Get lines AFTER command echo
-        all_lines = list(buffer.buffer.lines)
-        command_output_lines = all_lines[start_checking_from:]
-
-        # Check last 5 lines from command output only
-        recent_lines = command_output_lines[-5:] if len(command_output_lines) > 5 else command_output_lines
+        # Check last 5 lines from command output only (lines AFTER command echo)
+        recent_lines = self._tail(buffer.buffer.lines, min(5, total_lines - start_checking_from))
 
         if self.debug_logging:
             logger.info(f"[PROMPT CHECK] Checking {len(recent_lines)} recent lines from command output")
@@ -251,13 +273,11 @@ class PromptChecker:
 
         # Check ONLY the last line
         if hasattr(buffer, 'lines') and buffer.lines:
-            lines_list = list(buffer.lines)
-            if lines_list:
-                last_line = lines_list[-1]  # Only check the most recent line
-                line_text = last_line.text if hasattr(last_line, 'text') else str(last_line)
-                line_lower = line_text.lower()
-                if '[sudo] password' in line_lower:
-                    logger.info(f"Sudo prompt detected in last line: {line_text}")
-                    return True
+            last_line = buffer.lines[-1]  # Only check the most recent line
+            line_text = last_line.text if hasattr(last_line, 'text') else str(last_line)
+            line_lower = line_text.lower()
+            if '[sudo] password' in line_lower:
+                logger.info(f"Sudo prompt detected in last line: {line_text}")
+                return True
 
         return False
@@ -6,17 +6,30 @@ FIXED: Added venv support to fallback pattern
 
 import re
 import logging
-from typing import Optional, List, Tuple
-from dataclasses import dataclass
+from typing import Optional, List, Tuple, Dict
+from dataclasses import dataclass, field
 
 logger = logging.getLogger(__name__)
 
+# Fallback - flexible pattern that matches any user@host:path$ with optional venv prefix
+# FIXED: Added (\(.+\)\s+)? to support virtual environment prompts like (.venv) user@host:~$
+_FALLBACK_PATTERN = r"(\(.+\)\s+)?[a-zA-Z0-9_]+@[a-zA-Z0-9\-\.]+:.*[$#]\s*$"
+
+# Flexible pattern substituted for {host} - matches hostname OR IP
+_HOST_PATTERN = r"[a-zA-Z0-9\-\.]+"
+
 
 @dataclass
 class PromptPattern:
     """Represents a prompt pattern with substitution variables"""
     pattern: str
     description: str
+    _template: str = field(default="", init=False, repr=False, compare=False)
+    _substituted: Dict[str, str] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # {host} does not depend on the actual host, so resolve it once up front
+        self._template = self.pattern.replace("{host}", _HOST_PATTERN)
 
     def substitute(self, user: str, host: str) -> str:
         """
@@ -31,9 +44,10 @@ class PromptPattern:
 
         FIXED: Uses flexible pattern that matches any hostname/IP
         """
-        result = self.pattern.replace("{user}", user)
-        # Replace {host} with flexible pattern that matches hostname OR IP
-        result = result.replace("{host}", r"[a-zA-Z0-9\-\.]+")
+        result = self._substituted.get(user)
+        if result is None:
+            result = self._template.replace("{user}", user)
+            self._substituted[user] = result
         return result
 
 
@@ -75,16 +89,43 @@ class PromptPatternManager:
             for pcc in pcc_config
         ]
 
+        # Resolved (command, new_pattern) pairs grouped by the command's first
+        # character, preserving config order within each group
+        self._pcc_by_first_char: Dict[str, List[Tuple[str, str]]] = {}
+
         # Settings
         self.background_pattern = config.get("prompt_detection", {}).get("background_command_pattern", r"&\s*$")
 
         self.user = None
         self.host = None
 
+        # Resolved current prompt, recomputed whenever credentials change
+        self._current_prompt: Optional[str] = None
+
+        self._build_pcc_dispatch()
+
+        # Compiled prompt regexes keyed by pattern string
+        self._compiled_patterns: Dict[str, re.Pattern] = {}
+
     def set_credentials(self, user: str, host: str):
         """Set user and host for pattern substitution"""
         self.user = user
         self.host = host
+        self._current_prompt = self._resolve_current_prompt()
+        self._build_pcc_dispatch()
+
+    def _build_pcc_dispatch(self):
+        """Group prompt-changing commands by first character with substituted patterns"""
+        dispatch: Dict[str, List[Tuple[str, str]]] = {}
+        for pcc in self.prompt_changing_commands:
+            # Substitute variables
+            if self.user and self.host:
+                new_pattern = pcc.new_pattern.replace("{user}", self.user)
+                new_pattern = new_pattern.replace("{host}", _HOST_PATTERN)
+            else:
+                new_pattern = pcc.new_pattern
+            dispatch.setdefault(pcc.command[:1], []).append((pcc.command, new_pattern))
+        self._pcc_by_first_char = dispatch
 
     def get_prompt_patterns(self) -> List[str]:
         """
@@ -115,23 +156,26 @@ class PromptPatternManager:
             - detected: True if prompt found, "verify" if suspicious, False otherwise
             - reason: Description of detection result
         """
-        try:
-            if not re.search(prompt_pattern, line):
-                return False, "not_found"
-        except re.error as e:
-            logger.error(f"Invalid regex pattern '{prompt_pattern}': {e}")
-            return False, "invalid_pattern"
-
-        # CASE 1: Clean prompt (line is just the prompt)
-        # Example: "user@host:~$"
-        if line.strip() == prompt_pattern.strip() or re.fullmatch(prompt_pattern, line.strip()):
-            return True, "clean_prompt"
+        compiled = self._compiled_patterns.get(prompt_pattern)
+        if compiled is None:
+            try:
+                compiled = re.compile(prompt_pattern)
+            except re.error as e:
+                logger.error(f"Invalid regex pattern '{prompt_pattern}': {e}")
+                return False, "invalid_pattern"
+            self._compiled_patterns[prompt_pattern] = compiled
 
         # Extract prompt match
-        match = re.search(prompt_pattern, line)
+        match = compiled.search(line)
         if not match:
             return False, "not_found"
 
+        # CASE 1: Clean prompt (line is just the prompt)
+        # Example: "user@host:~$"
+        stripped = line.strip()
+        if stripped == prompt_pattern.strip() or compiled.fullmatch(stripped):
+            return True, "clean_prompt"
+
         before = line[:match.start()]
         after = line[match.end():]
 
@@ -168,15 +212,9 @@ class PromptPatternManager:
         """
         cmd_stripped = command.strip()
 
-        for pcc in self.prompt_changing_commands:
-            if cmd_stripped.startswith(pcc.command):
-                # Substitute variables
-                if self.user and self.host:
-                    new_pattern = pcc.new_pattern.replace("{user}", self.user)
-                    new_pattern = new_pattern.replace("{host}", r"[a-zA-Z0-9\-\.]+")
-                    return new_pattern
-                else:
-                    return pcc.new_pattern
+        for pcc_command, new_pattern in self._pcc_by_first_char.get(cmd_stripped[:1], ()):
+            if cmd_stripped.startswith(pcc_command):
+                return new_pattern
 
         return None
 
@@ -199,11 +237,14 @@ class PromptPatternManager:
         Returns:
             Regex pattern for current prompt
         """
+        if self._current_prompt is None:
+            self._current_prompt = self._resolve_current_prompt()
+        return self._current_prompt
+
+    def _resolve_current_prompt(self) -> str:
+        """Pick the current prompt pattern for the active credentials"""
         patterns = self.get_prompt_patterns()
         if patterns:
             # Return first (most common) pattern
             return patterns[0]
-        else:
-            # Fallback - flexible pattern that matches any user@host:path$ with optional venv prefix
-            # FIXED: Added (\(.+\)\s+)? to support virtual environment prompts like (.venv) user@host:~$
-            return r"(\(.+\)\s+)?[a-zA-Z0-9_]+@[a-zA-Z0-9\-\.]+:.*[$#]\s*$"
+        return _FALLBACK_PATTERN
@@ -6,8 +6,10 @@ CLEANED: Removed unused HistoryManager
 FIXED: Use PromptDetectionConfig patterns (with defaults) instead of raw YAML
 """
 
+import asyncio
 import threading
 import logging
+from collections import deque, OrderedDict
 from typing import Optional
 
 logger = logging.getLogger(__name__)
@@ -23,6 +25,11 @@ from state.shared_state_conversation import ConversationState
 from state.shared_state_transfer import TransferState
 from state.shared_state_monitor import monitor_command as _monitor_command
 
+# strip_ansi_codes memo: chunks up to this size are cached (prompts, redraws,
+# spinner frames repeat verbatim), bounded to this many entries
+_ANSI_CACHE_MAX_CHUNK = 4096
+_ANSI_CACHE_SIZE = 128
+
 
 class SharedTerminalState:
     """
@@ -34,15 +41,20 @@ class SharedTerminalState:
     _lock = threading.Lock()
 
     def __new__(cls):
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
+        # Fast path: single class attribute load once the instance exists
+        inst = cls._instance
+        if inst is not None:
+            return inst
+        with cls._lock:
+            inst = cls._instance
+            if inst is None:
+                inst = super().__new__(cls)
+                inst._initialized = False
+                cls._instance = inst
+        return inst
 
     def __init__(self):
-        if self._initialized:
+        if self.__dict__.get('_initialized'):
             return
 
         self.config: Optional[Config] = None
@@ -52,14 +64,17 @@ class SharedTerminalState:
         self.command_registry: Optional[CommandRegistry] = None
         self.prompt_detector: Optional[PromptDetector] = None
         self.database: Optional[DatabaseManager] = None
+        self.monitor_loop: Optional[asyncio.AbstractEventLoop] = None
 
         # Initialize conversation and transfer state
         self._conversation_state = ConversationState()
         self._transfer_state = TransferState()
 
+        self.web_server = None  # WebTerminalServer for transfer broadcasts, if attached
         self.web_server_running = False
-        self.output_queue = []
-        self.output_lock = threading.Lock()
+        # deque append/popleft are atomic under the GIL - no lock needed
+        self.output_queue = deque()
+        self._ansi_cache: "OrderedDict[str, str]" = OrderedDict()
 
         self._initialized = True
 
@@ -152,8 +167,19 @@ class SharedTerminalState:
             )
 
         # Set output callback to route to output queue
+        # Buffer and queue are fixed from here on, so install a handler with
+        # its collaborators pre-bound instead of the generic method
+        self._handle_output = self._make_output_handler()
         self.ssh_manager.set_output_callback(self._handle_output)
 
+        # Background event loop shared by all monitor_command threads
+        self.monitor_loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=self.monitor_loop.run_forever,
+            name="command-monitor-loop",
+            daemon=True
+        ).start()
+
     def update_credentials(self, user: str, host: str):
         """
         Update prompt detector credentials when switching servers
@@ -162,14 +188,14 @@ class SharedTerminalState:
             user: New username
             host: New hostname
         """
-        if self.prompt_detector:
-            self.prompt_detector.set_credentials(user=user, host=host)
-            #logger.info(f"Updated prompt detector credentials: {user}@{host}")
-
         logger.info(f"Update_credentials called with user='{user}', host='{host}'")
         if self.prompt_detector:
             self.prompt_detector.set_credentials(user=user, host=host)
-            #logger.info(f"DEBUG: AFTER set_credentials - prompt_detector.user='{self.prompt_detector.user}', prompt_detector.host='{self.prompt_detector.host}'")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"After set_credentials - prompt_detector.user='{self.prompt_detector.user}', "
+                    f"prompt_detector.host='{self.prompt_detector.host}'"
+                )
             logger.info(f"Updated prompt detector credentials: {user}@{host}")
         else:
             logger.warning("DEBUG: prompt_detector is None!")
@@ -189,7 +215,7 @@ class SharedTerminalState:
     @current_machine_id.setter
     def current_machine_id(self, value: str) -> None:
         """Set current machine ID"""
-        self._conversation_state.current_machine_id = value
+        self._conversation_state.set_current_server(value)
 
     @property
     def active_conversations(self):
@@ -280,23 +306,76 @@ class SharedTerminalState:
             output: Raw output from SSH (includes ANSI codes)
         """
         # Add to output queue for xterm.js
-        with self.output_lock:
-            self.output_queue.append(output)
+        self.output_queue.append(output)
 
         # Add to buffer (for Claude filtering) - strip ANSI for filtering
         if self.buffer:
-            clean = strip_ansi_codes(output)
-            self.buffer.add(clean)
+            self.buffer.add(self._strip_ansi_cached(output))
+
+    def _make_output_handler(self):
+        """
+        Build an SSH output callback specialized for the configured buffer
+
+        Returns:
+            Callable with the same contract as _handle_output
+        """
+        queue_append = self.output_queue.append
+
+        if self.buffer is None:
+            def handle_output(output: str):
+                queue_append(output)
+            return handle_output
+
+        buffer_add = self.buffer.add
+        strip_ansi = self._strip_ansi_cached
+
+        def handle_output(output: str):
+            queue_append(output)
+            buffer_add(strip_ansi(output))
+        return handle_output
+
+    def _strip_ansi_cached(self, output: str) -> str:
+        """
+        strip_ansi_codes with a small LRU cache for repeated chunks
+
+        Args:
+            output: Raw output chunk
+
+        Returns:
+            Chunk without ANSI codes
+        """
+        if len(output) > _ANSI_CACHE_MAX_CHUNK:
+            return strip_ansi_codes(output)
+
+        cache = self._ansi_cache
+        clean = cache.get(output)
+        if clean is not None:
+            cache.move_to_end(output)
+            return clean
+
+        clean = strip_ansi_codes(output)
+        if len(cache) >= _ANSI_CACHE_SIZE:
+            cache.popitem(last=False)
+        cache[output] = clean
+        return clean
 
     def get_output(self):
         """Get queued output for web UI"""
-        with self.output_lock:
-            if self.output_queue:
-                output = ''.join(self.output_queue)
-                self.output_queue.clear()
-                return output
+        queue = self.output_queue
+        if not queue:
             return ''
 
+        # Drain with popleft rather than join+clear so chunks appended by the
+        # SSH reader thread while we drain are kept for the next call
+        chunks = []
+        popleft = queue.popleft
+        try:
+            while True:
+                chunks.append(popleft())
+        except IndexError:
+            pass
+        return ''.join(chunks)
+
     def is_connected(self) -> bool:
         """Check if connected to any server"""
         return self.ssh_manager and self.ssh_manager.is_connected()
@@ -310,23 +389,32 @@ class SharedTerminalState:
 # ========== SFTP TRANSFER TRACKING (Phase 2.5) - delegate to TransferState ==========
     def start_transfer(self, transfer_id: str, progress_dict: dict) -> None:
         """Register a new SFTP transfer"""
-        web_server = self.web_server if hasattr(self, 'web_server') else None
-        self._transfer_state.start_transfer(transfer_id, progress_dict, web_server)
+        self._transfer_state.start_transfer(transfer_id, progress_dict, self.web_server)
 
     def update_transfer_progress(self, transfer_id: str, progress_dict: dict) -> None:
         """Update progress for an active transfer"""
-        web_server = self.web_server if hasattr(self, 'web_server') else None
-        self._transfer_state.update_transfer_progress(transfer_id, progress_dict, web_server)
+        self._transfer_state.update_transfer_progress(transfer_id, progress_dict, self.web_server)
 
     def complete_transfer(self, transfer_id: str, result: dict) -> None:
         """Mark a transfer as complete"""
-        web_server = self.web_server if hasattr(self, 'web_server') else None
-        self._transfer_state.complete_transfer(transfer_id, result, web_server)
+        self._transfer_state.complete_transfer(transfer_id, result, self.web_server)
 
-    def get_active_transfers(self) -> dict:
-        """Get all active transfers"""
+    def get_active_transfers(self):
+        """Get all active transfers (read-only live view)"""
         return self._transfer_state.get_active_transfers()
 
+    def snapshot_transfers(self) -> dict:
+        """Get a point-in-time copy of all active transfers"""
+        return self._transfer_state.snapshot_transfers()
+
+    def mark_transfers_observed(self, transfers: dict) -> None:
+        """Record the transfer progress a web client has just been served"""
+        self._transfer_state.mark_observed(transfers)
+
+    def wait_transfer_observed(self, transfer_id: str, phase: str, timeout: float) -> bool:
+        """Block until a web client has seen a transfer in the given phase"""
+        return self._transfer_state.wait_until_observed(transfer_id, phase, timeout)
+
     @property
     def active_transfers(self):
         """Get active transfers dict"""
@@ -340,12 +428,17 @@ def monitor_command(command_id: str):
     Args:
         command_id: Command ID to monitor
     """
-    _monitor_command(command_id, _shared_state)
+    _monitor_command(command_id, get_shared_state())
+
 
+class _Holder:
+    """Holds the global shared state, created on first access"""
+    instance = None
 
-# Global shared state
-_shared_state = SharedTerminalState()
 
 def get_shared_state() -> SharedTerminalState:
     """Get the global shared state instance"""
-    return _shared_state
+    inst = _Holder.instance
+    if inst is None:
+        inst = _Holder.instance = SharedTerminalState()
+    return inst
@@ -4,11 +4,13 @@ from .ssh_manager import SSHManager
 from .ssh_connection import SSHConnection
 from .ssh_commands import SSHCommandExecutor, CommandResult
 from .ssh_io import SSHInputOutput
+from .ssh_pool import SSHConnectionPool
 
 __all__ = [
     'SSHManager',
     'SSHConnection',
     'SSHCommandExecutor',
     'CommandResult',
-    'SSHInputOutput'
+    'SSHInputOutput',
+    'SSHConnectionPool'
 ]
@@ -3,12 +3,24 @@ SSH Command Execution
 Handles command execution and result processing
 """
 
+import re
+import select
+import shlex
+import socket
 import time
 import logging
 from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import quote
 
 logger = logging.getLogger(__name__)
 
+# recv() block size for draining command output
+_RECV_SIZE = 65536
+
+# Upper bound on a single readiness wait while draining a command
+_SELECT_TIMEOUT = 0.1
+
 
 @dataclass
 class CommandResult:
@@ -32,6 +44,10 @@ class SSHCommandExecutor:
         """
         self.connection = connection
 
+        # Password redaction pattern, rebuilt only when the password changes
+        self._password_re: Optional[re.Pattern] = None
+        self._password_re_for: Optional[str] = None
+
     def execute_command(self, command: str, timeout: int = 30) -> CommandResult:
         """
         Execute command and wait for completion
@@ -43,31 +59,51 @@ class SSHCommandExecutor:
         Returns:
             CommandResult with output and status
         """
-        if not self.connection.connected or not self.connection.shell:
+        if not self.connection.connected or not self.connection.client:
             raise Exception("Not connected to remote machine")
 
         start_time = time.time()
 
         try:
-            # Send command
-            self.connection.shell.send(command + '\n')
-
-            # Wait for command to complete (simple implementation)
-            # In production, should use more sophisticated completion detection
-            time.sleep(0.5)
-
-            output = ""
-            while self.connection.shell.recv_ready():
-                chunk = self.connection.shell.recv(8192).decode('utf-8', errors='replace')
-                output += chunk
-                time.sleep(0.1)
+            # Separate exec channel - does not interfere with the interactive
+            # shell and reports the real exit status
+            stdin, stdout, stderr = self.connection.client.exec_command(
+                command, timeout=timeout, bufsize=-1
+            )
+            stdin.close()
+            channel = stdout.channel
+
+            # Drain stdout and stderr together so neither side can fill its
+            # window and stall the command
+            deadline = start_time + timeout
+            out_buf = bytearray()
+            err_buf = bytearray()
+            while True:
+                if channel.recv_ready():
+                    out_buf += channel.recv(_RECV_SIZE)
+                elif channel.recv_stderr_ready():
+                    err_buf += channel.recv_stderr(_RECV_SIZE)
+                elif channel.exit_status_ready():
+                    break
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        channel.close()
+                        raise socket.timeout(f"Command timed out after {timeout}s")
+                    # stdout data and channel close wake this immediately;
+                    # stderr-only output is picked up on the short timeout
+                    select.select([channel], [], [], min(remaining, _SELECT_TIMEOUT))
+
+            exit_code = channel.recv_exit_status()
+            output = out_buf.decode('utf-8', errors='replace')
+            error_output = err_buf.decode('utf-8', errors='replace')
 
             duration = time.time() - start_time
 
             return CommandResult(
                 stdout=output,
-                stderr="",
-                exit_code=0,
+                stderr=error_output,
+                exit_code=exit_code,
                 duration=duration,
                 command=command
             )
@@ -93,7 +129,9 @@ class SSHCommandExecutor:
 
         try:
             # Log sanitized version
-            logger.info(f"Executing simple command: {command}")
+            # Redaction scans the whole command - skip it when INFO is off
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Executing simple command: %s", self._sanitize_command_for_log(command))
 
             # Use exec_command which creates a SEPARATE channel
             # This doesn't interfere with the interactive shell
@@ -118,6 +156,16 @@ class SSHCommandExecutor:
         Returns:
             Sanitized command for logging
         """
-        if self.connection.password and self.connection.password in command:
-            return command.replace(self.connection.password, "***PASSWORD***")
-        return command
+        password = self.connection.password
+        if not password:
+            return command
+
+        if password != self._password_re_for:
+            # Raw password plus its shell-quoted and URL-encoded forms,
+            # longest first so a variant is not partially replaced
+            variants = sorted({password, shlex.quote(password), quote(password, safe='')},
+                              key=len, reverse=True)
+            self._password_re = re.compile('|'.join(map(re.escape, variants)))
+            self._password_re_for = password
+
+        return self._password_re.sub("***PASSWORD***", command)
@@ -3,7 +3,9 @@ SSH Connection Management
 Handles SSH connection, reconnection, and lifecycle
 """
 
+import getpass
 import paramiko
+import random
 import socket
 import time
 import logging
@@ -11,13 +13,26 @@ from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+from .ssh_pool import SSHConnectionPool
+
+# Host names that always mean this machine
+_LOOPBACK_HOSTS = frozenset({'localhost', '127.0.0.1', '::1'})
+
+# SFTP channel flow control - a 4 MiB window keeps the pipe full on high
+# latency links where paramiko's 2 MiB default stalls waiting for updates
+_SFTP_WINDOW_SIZE = 4 * 1024 * 1024
+_SFTP_MAX_PACKET_SIZE = 512 * 1024
+
 
 class SSHConnection:
     """Manages SSH connection lifecycle"""
 
     def __init__(self, host: str = "", user: str = "", password: str = "", port: int = 22,
                  keepalive_interval: int = 30, reconnect_attempts: int = 3,
-                 connection_timeout: int = 10):
+                 connection_timeout: int = 10, tcp_nodelay: bool = True,
+                 keepalive_idle: int = 60, keepalive_intvl: int = 10, keepalive_cnt: int = 3,
+                 pool_connections: bool = True, reconnect_backoff_cap: float = 10.0,
+                 window_size: int = 4 * 1024 * 1024, max_packet_size: int = 512 * 1024):
         """
         Initialize SSH Connection Manager
 
@@ -29,6 +44,15 @@ class SSHConnection:
             keepalive_interval: Seconds between keepalive packets
             reconnect_attempts: Number of reconnection attempts
             connection_timeout: Connection timeout in seconds
+            tcp_nodelay: Disable Nagle's algorithm so keystrokes are sent immediately
+            keepalive_idle: Idle seconds before the first TCP keepalive probe
+            keepalive_intvl: Seconds between TCP keepalive probes
+            keepalive_cnt: Unanswered probes before the connection is dropped
+            pool_connections: Keep the client alive in SSHConnectionPool on
+                disconnect so switching back to this server skips the handshake
+            reconnect_backoff_cap: Longest delay in seconds between reconnection attempts
+            window_size: Flow-control window for shell and exec channels
+            max_packet_size: Largest packet the server may send on those channels
         """
         self.host = host
         self.user = user
@@ -37,12 +61,22 @@ class SSHConnection:
         self.keepalive_interval = keepalive_interval
         self.reconnect_attempts = reconnect_attempts
         self.connection_timeout = connection_timeout
+        self.tcp_nodelay = tcp_nodelay
+        self.keepalive_idle = keepalive_idle
+        self.keepalive_intvl = keepalive_intvl
+        self.keepalive_cnt = keepalive_cnt
+        self.pool_connections = pool_connections
+        self.reconnect_backoff_cap = reconnect_backoff_cap
+        self.window_size = window_size
+        self.max_packet_size = max_packet_size
 
         self.client: Optional[paramiko.SSHClient] = None
         self.shell: Optional[paramiko.Channel] = None
         self.connected = False
         self.reconnecting = False
         self._sftp = None
+        self._pool_key = None  # Endpoint the current client belongs to
+        self._transport: Optional[paramiko.Transport] = None
 
     def reconfigure(self, host: str, user: str, password: str, port: int = 22) -> None:
         """
@@ -61,7 +95,7 @@ class SSHConnection:
         self.user = user
         self.password = password
         self.port = port
-        logger.info(f"SSH connection reconfigured for {user}@{host}:{port}")
+        logger.info("SSH connection reconfigured for %s@%s:%s", user, host, port)
 
     def connect(self, host: str = None, user: str = None, password: str = None, port: int = None) -> bool:
         """
@@ -87,49 +121,138 @@ class SSHConnection:
             self.port = port
 
         try:
-            logger.info(f"Connecting to {self.user}@{self.host}:{self.port}")
+            logger.info("Connecting to %s@%s:%s", self.user, self.host, self.port)
 
             ## logger.info(f"DEBUG: password='{self.password}', type={type(self.password)}, len={len(self.password)}")  
 
 
-            self.client = paramiko.SSHClient()
-            self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-            self.client.connect(
-                hostname=self.host,
-                port=self.port,
-                username=self.user,
-                password=self.password,
-                timeout=self.connection_timeout,
-                look_for_keys=False,
-                allow_agent=False
-            )
-
-            # Set keepalive
-            transport = self.client.get_transport()
-            if transport:
-                transport.set_keepalive(self.keepalive_interval)
+            self._pool_key = (self.host, self.port, self.user, self.password)
+            pooled = SSHConnectionPool.acquire(self._pool_key) if self.pool_connections else None
+            self.client = pooled if pooled is not None else self._open_client()
 
-            # Get interactive shell
-            self.shell = self.client.invoke_shell(
-                term='xterm-256color',
-                width=120,
-                height=40
-            )
+            try:
+                self._start_shell()
+            except Exception as e:
+                if pooled is None:
+                    raise
+                # The pooled transport passed the liveness check but its peer
+                # is gone - drop it and connect afresh once
+                logger.warning(f"Pooled SSH client is stale ({e}), reconnecting")
+                self._close_client()
+                self.client = self._open_client()
+                self._start_shell()
 
             self.connected = True
             logger.info("SSH connection established")
 
-            # Wait for initial output (welcome message + prompt)
-            time.sleep(0.5)
-
             return True
 
         except Exception as e:
             logger.error(f"Connection failed: {e}")
+            self._close_client()
             self.connected = False
             return False
 
+    def _open_client(self) -> paramiko.SSHClient:
+        """
+        Open and authenticate a new SSH client
+
+        Returns:
+            Connected paramiko.SSHClient
+        """
+        # Open the TCP socket ourselves so its options already apply
+        # to the key exchange and auth round trips
+        sock = socket.create_connection((self.host, self.port), timeout=self.connection_timeout)
+        self._configure_socket(sock)
+
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+
+        try:
+            client.connect(
+                hostname=self.host,
+                port=self.port,
+                username=self.user,
+                password=self.password,
+                timeout=self.connection_timeout,
+                look_for_keys=False,
+                allow_agent=False,
+                sock=sock
+            )
+        except Exception:
+            sock.close()
+            raise
+
+        # Set keepalive
+        transport = client.get_transport()
+        if transport:
+            transport.set_keepalive(self.keepalive_interval)
+
+        return client
+
+    def _start_shell(self) -> None:
+        """Configure the client's transport and open the interactive shell"""
+        self._transport = self.client.get_transport()
+
+        # Larger channel window keeps heavy output (find /, big logs)
+        # flowing on high-latency links; applies to channels opened below
+        self._transport.default_window_size = self.window_size
+        self._transport.default_max_packet_size = self.max_packet_size
+
+        # Get interactive shell
+        self.shell = self.client.invoke_shell(
+            term='xterm-256color',
+            width=120,
+            height=40
+        )
+
+    def _close_client(self) -> None:
+        """Close the current client without returning it to the pool"""
+        if self.client is not None:
+            try:
+                self.client.close()
+            except Exception:
+                pass
+        self.client = None
+        self.shell = None
+        self._transport = None
+
+    def _configure_socket(self, sock) -> None:
+        """
+        Apply TCP options to the transport socket
+
+        Args:
+            sock: Socket underlying the SSH transport
+        """
+        if self.tcp_nodelay:
+            try:
+                # Small interactive writes (keystrokes, Ctrl+C) should not wait
+                # on Nagle + delayed ACK
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError as e:
+                logger.warning(f"Could not set TCP_NODELAY: {e}")
+
+        # TCP-level keepalive detects a silently dead peer in roughly
+        # idle + intvl * cnt seconds, instead of the OS default of hours
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            if hasattr(socket, 'TCP_KEEPIDLE'):
+                # Linux
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, self.keepalive_idle)
+            elif hasattr(socket, 'TCP_KEEPALIVE'):
+                # macOS - idle time only
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, self.keepalive_idle)
+            elif hasattr(socket, 'SIO_KEEPALIVE_VALS'):
+                # Windows - (enabled, idle ms, interval ms)
+                sock.ioctl(socket.SIO_KEEPALIVE_VALS,
+                           (1, self.keepalive_idle * 1000, self.keepalive_intvl * 1000))
+            if hasattr(socket, 'TCP_KEEPINTVL'):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, self.keepalive_intvl)
+            if hasattr(socket, 'TCP_KEEPCNT'):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, self.keepalive_cnt)
+        except OSError as e:
+            logger.warning(f"Could not configure TCP keepalive: {e}")
+
     def disconnect(self) -> None:
         """Close SSH connection"""
         logger.info("Disconnecting SSH")
@@ -152,11 +275,17 @@ class SSHConnection:
             self.shell = None
 
         if self.client:
-            try:
-                self.client.close()
-            except:
-                pass
+            if self.pool_connections and self._pool_key is not None:
+                # Keep the authenticated transport for a later switch back
+                SSHConnectionPool.release(self._pool_key, self.client)
+            else:
+                try:
+                    self.client.close()
+                except:
+                    pass
             self.client = None
+            self._pool_key = None
+        self._transport = None
 
         self.connected = False
         logger.info("SSH disconnected")
@@ -174,11 +303,18 @@ class SSHConnection:
         self.reconnecting = True
         logger.info("Attempting reconnection...")
 
+        # The old transport is suspect - close it rather than pooling it
+        self._pool_key = None
         self.disconnect()
 
+        delay = 0.0
         for attempt in range(self.reconnect_attempts):
-            logger.info(f"Reconnection attempt {attempt + 1}/{self.reconnect_attempts}")
-            time.sleep(2 ** attempt)  # Exponential backoff
+            logger.info("Reconnection attempt %d/%d", attempt + 1, self.reconnect_attempts)
+            # First retry is immediate; later ones use decorrelated jitter so
+            # clients dropped together do not retry in lockstep
+            if attempt:
+                delay = min(self.reconnect_backoff_cap, random.uniform(0.1, delay * 3 if delay else 1.0))
+                time.sleep(delay)
 
             if self.connect():
                 self.reconnecting = False
@@ -191,8 +327,24 @@ class SSHConnection:
 
     def is_connected(self) -> bool:
         """Check if currently connected"""
-        return self.connected and self.client and self.client.get_transport() and \
-               self.client.get_transport().is_active()
+        transport = self._transport
+        return self.connected and transport is not None and transport.is_active()
+
+    def is_local(self) -> bool:
+        """
+        Check if the connection is to this machine as the current user.
+
+        Only a loopback host on the default port qualifies - other ports
+        are usually tunnels or containers. This is a precondition, not
+        proof: transfers still confirm the filesystem is shared before
+        copying files directly instead of through SFTP.
+        """
+        if self.host.lower() not in _LOOPBACK_HOSTS or self.port != 22:
+            return False
+        try:
+            return self.user == getpass.getuser()
+        except Exception:
+            return False
 
     def get_connection_info(self) -> dict:
         """Get connection information"""
@@ -221,10 +373,33 @@ class SSHConnection:
         # Create new SFTP client if needed
         if self._sftp is None or self._sftp.get_channel().closed:
             logger.info("Creating new SFTP client")
-            self._sftp = self.client.open_sftp()
+            self._sftp = self.open_sftp()
 
         return self._sftp
 
+    def open_sftp(self) -> paramiko.SFTPClient:
+        """
+        Open an additional SFTP client on the existing SSH transport.
+
+        Each client is its own channel, so parallel transfers do not share
+        one request stream. The caller owns (and closes) the client.
+
+        Returns:
+            paramiko.SFTPClient: New SFTP client
+
+        Raises:
+            RuntimeError: If SSH not connected
+        """
+        if not self.is_connected():
+            raise RuntimeError("SSH not connected. Use connect() first.")
+
+        channel = self._transport.open_session(
+            window_size=_SFTP_WINDOW_SIZE,
+            max_packet_size=_SFTP_MAX_PACKET_SIZE
+        )
+        channel.invoke_subsystem('sftp')
+        return paramiko.SFTPClient(channel)
+
     def resize_pty(self, cols: int, rows: int) -> bool:
         """
         Resize the pseudo-terminal
@@ -242,7 +417,7 @@ class SSHConnection:
 
         try:
             self.shell.resize_pty(width=cols, height=rows)
-            logger.debug(f"PTY resized to {cols}x{rows}")
+            logger.debug("PTY resized to %dx%d", cols, rows)
             return True
         except Exception as e:
             logger.error(f"Failed to resize PTY: {e}")
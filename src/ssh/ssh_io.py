@@ -3,14 +3,22 @@ SSH Input/Output Operations
 Handles shell input, output reading, and callbacks
 """
 
+import codecs
+import selectors
 import socket
 import threading
-import time
 import logging
 from typing import Optional, Callable
 
 logger = logging.getLogger(__name__)
 
+# recv() block size for shell output
+_RECV_SIZE = 65536
+
+# Already-buffered data is drained and delivered in one callback up to this
+# size, which keeps latency bounded during huge output floods
+_COALESCE_MAX_BYTES = 256 * 1024
+
 
 class SSHInputOutput:
     """Handles SSH shell input and output operations"""
@@ -24,8 +32,17 @@ class SSHInputOutput:
         """
         self.connection = connection
         self._output_callback: Optional[Callable[[str], None]] = None
+        self._output_callback_bytes: Optional[Callable[[bytes], None]] = None
         self._reader_thread: Optional[threading.Thread] = None
         self._stop_reader = threading.Event()
+        # One long-lived reader thread serves every connection: it sleeps on
+        # _shell_ready between connections and sets _reader_idle when parked
+        self._shell_ready = threading.Event()
+        self._reader_idle = threading.Event()
+        self._reader_idle.set()
+        self._first_output = threading.Event()  # Set once the reader delivers output
+        # Keeps a multi-byte UTF-8 character split across recv() calls intact
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
 
     def send_input(self, text: str) -> None:
         """
@@ -37,21 +54,30 @@ class SSHInputOutput:
         Args:
             text: Text to send (can include newline)
         """
-        if not self.connection.connected or not self.connection.shell:
+        shell = self.connection.shell
+        if not self.connection.connected or not shell:
             raise Exception("Not connected to remote machine")
 
+        # Fast path: single keypress (Enter, Tab, a typed character) - one
+        # send with no split; a few bytes always fit in one packet
+        if len(text) == 1:
+            shell.send(text.encode('utf-8'))
+            return
+
+        data = memoryview(text.encode('utf-8'))
+
         # If text ends with newline, send command first, then newline
         if text.endswith('\n'):
-            command = text[:-1]  # Remove the trailing newline
-            if command:
-                # Send command text (gets echoed on same line as prompt)
-                self.connection.shell.send(command)
-                time.sleep(0.05)  # Small delay for echo
+            if len(data) > 1:
+                # Send command text (gets echoed on same line as prompt).
+                # TCP_NODELAY puts it on the wire immediately, so no delay
+                # is needed before the newline
+                self._send_all(data[:-1])
             # Now send the newline (executes command)
-            self.connection.shell.send('\n')
+            self._send_all(data[-1:])
         else:
             # Just send as-is (for things like Tab character)
-            self.connection.shell.send(text)
+            self._send_all(data)
 
     def send_interrupt(self) -> None:
         """Send Ctrl+C interrupt signal"""
@@ -59,7 +85,26 @@ class SSHInputOutput:
             raise Exception("Not connected to remote machine")
 
         # Send Ctrl+C (ASCII 3)
-        self.connection.shell.send('\x03')
+        self.connection.shell.send(b'\x03')
+
+    def _send_all(self, data: memoryview) -> None:
+        """
+        Send every byte, following up on partial sends
+
+        Channel.send may accept only part of the data (window/packet size);
+        slicing the memoryview keeps large pastes from being re-copied.
+
+        Args:
+            data: Encoded bytes to send
+        """
+        shell = self.connection.shell
+        offset = 0
+        total = len(data)
+        while offset < total:
+            sent = shell.send(data[offset:])
+            if sent == 0:
+                raise Exception("Shell channel closed while sending input")
+            offset += sent
 
     def set_output_callback(self, callback: Callable[[str], None]) -> None:
         """
@@ -70,21 +115,69 @@ class SSHInputOutput:
         """
         self._output_callback = callback
 
+    def set_output_callback_bytes(self, callback: Optional[Callable[[bytes], None]]) -> None:
+        """
+        Set callback function for raw (undecoded) output streaming
+
+        When set, it replaces the str callback and output is never decoded -
+        for consumers that feed bytes straight into a terminal parser.
+
+        Args:
+            callback: Function to call with raw output bytes (None to clear)
+        """
+        self._output_callback_bytes = callback
+
     def start_reader(self) -> None:
-        """Start background thread to read shell output"""
+        """Start reading shell output (reader thread is created on first use)"""
         self._stop_reader.clear()
-        self._reader_thread = threading.Thread(
-            target=self._read_output,
-            daemon=True
-        )
-        self._reader_thread.start()
+        self._first_output.clear()
+        self._decoder.reset()
+        self._reader_idle.clear()
+
+        if self._reader_thread is None or not self._reader_thread.is_alive():
+            self._reader_thread = threading.Thread(
+                target=self._reader_main,
+                name="ssh-output-reader",
+                daemon=True
+            )
+            self._reader_thread.start()
+
+        self._shell_ready.set()
 
     def stop_reader(self) -> None:
-        """Stop background output reader thread"""
+        """Stop reading shell output; the reader thread parks until the next start"""
         self._stop_reader.set()
 
-        if self._reader_thread and self._reader_thread.is_alive():
-            self._reader_thread.join(timeout=2)
+        if not self._reader_idle.wait(timeout=2):
+            return  # Still reading; leave the decoder to it
+
+        # Flush a trailing partial character, if any
+        tail = self._decoder.decode(b'', final=True)
+        if tail and self._output_callback:
+            self._output_callback(tail)
+
+    def wait_for_first_output(self, timeout: float) -> bool:
+        """
+        Block until the reader has delivered its first output
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if output arrived, False on timeout
+        """
+        return self._first_output.wait(timeout)
+
+    def _reader_main(self) -> None:
+        """Reader thread body - read each connection's shell until stopped"""
+        while True:
+            self._shell_ready.wait()
+            self._shell_ready.clear()
+            self._reader_idle.clear()
+            try:
+                self._read_output()
+            finally:
+                self._reader_idle.set()
 
     def _read_output(self) -> None:
         """
@@ -92,24 +185,71 @@ class SSHInputOutput:
 
         FIXED: Uses blocking read with timeout instead of recv_ready() polling.
         This ensures small packets (like shell prompts) are captured immediately.
+        Readiness is awaited on a selector, so an idle terminal costs one
+        select call per 0.5s and a prompt is read as soon as it arrives.
         """
         logger.debug("Output reader thread started")
 
+        # epoll/kqueue where available; owned by this thread
+        selector = selectors.DefaultSelector()
+        registered = None
+
         while not self._stop_reader.is_set() and self.connection.connected:
             try:
-                if self.connection.shell:
-                    # Set timeout on channel - blocks up to 0.5s waiting for data
-                    self.connection.shell.settimeout(0.5)
+                shell = self.connection.shell
+                if shell:
+                    # (Re)register when the channel changes, e.g. after reconnect
+                    if shell is not registered:
+                        if registered is not None:
+                            try:
+                                selector.unregister(registered)
+                            except (KeyError, ValueError, OSError):
+                                pass
+                            # Partial bytes from the old channel will never complete
+                            self._decoder.reset()
+                        # This thread is the shell channel's only reader, so
+                        # recv() after select does not block; the timeout is a
+                        # backstop that keeps the stop flag checked regardless
+                        shell.settimeout(0.5)
+                        selector.register(shell, selectors.EVENT_READ)
+                        registered = shell
+
+                    # Block up to 0.5s waiting for data
+                    if not selector.select(timeout=0.5):
+                        # No data for 0.5s - normal for idle terminal
+                        # Loop continues to check stop flag
+                        continue
 
                     try:
-                        # Blocking read - returns immediately when data arrives
+                        # Data is ready - returns immediately
                         # This captures prompts and all output reliably
-                        chunk = self.connection.shell.recv(8192).decode('utf-8', errors='replace')
-                        if chunk and self._output_callback:
-                            self._output_callback(chunk)
+                        data = shell.recv(_RECV_SIZE)
+
+                        # Coalesce anything else already buffered so bursts of
+                        # small packets reach the callback as one chunk
+                        if data and shell.recv_ready():
+                            buf = bytearray(data)
+                            while len(buf) < _COALESCE_MAX_BYTES and shell.recv_ready():
+                                more = shell.recv(_RECV_SIZE)
+                                if not more:
+                                    break
+                                buf += more
+                            data = buf
+
+                        bytes_callback = self._output_callback_bytes
+                        if bytes_callback:
+                            # Raw consumer - skip the decode entirely
+                            chunk = bytes(data)
+                            if chunk:
+                                bytes_callback(chunk)
+                        else:
+                            chunk = self._decoder.decode(data)
+                            if chunk and self._output_callback:
+                                self._output_callback(chunk)
+                        if chunk and not self._first_output.is_set():
+                            self._first_output.set()
                     except socket.timeout:
-                        # No data for 0.5s - normal for idle terminal
-                        # Loop continues to check stop flag
+                        # Backstop only - see settimeout above
                         pass
 
             except Exception as e:
@@ -117,4 +257,5 @@ class SSHInputOutput:
                 if not self.connection.reconnect():
                     break
 
+        selector.close()
         logger.debug("Output reader thread stopped")
@@ -5,7 +5,8 @@ Version 3.0 - Multi-Server Support
 """
 
 import logging
-from typing import Optional, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Callable, List
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +23,10 @@ class SSHManager:
 
     def __init__(self, host: str = "", user: str = "", password: str = "", port: int = 22,
                  keepalive_interval: int = 30, reconnect_attempts: int = 3,
-                 connection_timeout: int = 10):
+                 connection_timeout: int = 10, tcp_nodelay: bool = True,
+                 keepalive_idle: int = 60, keepalive_intvl: int = 10, keepalive_cnt: int = 3,
+                 pool_connections: bool = True, reconnect_backoff_cap: float = 10.0,
+                 window_size: int = 4 * 1024 * 1024, max_packet_size: int = 512 * 1024):
         """
         Initialize SSH Manager
 
@@ -34,6 +38,14 @@ class SSHManager:
             keepalive_interval: Seconds between keepalive packets
             reconnect_attempts: Number of reconnection attempts
             connection_timeout: Connection timeout in seconds
+            tcp_nodelay: Disable Nagle's algorithm on the SSH socket
+            keepalive_idle: Idle seconds before the first TCP keepalive probe
+            keepalive_intvl: Seconds between TCP keepalive probes
+            keepalive_cnt: Unanswered probes before the connection is dropped
+            pool_connections: Reuse idle SSH clients when switching back to a server
+            reconnect_backoff_cap: Longest delay in seconds between reconnection attempts
+            window_size: Flow-control window for shell and exec channels
+            max_packet_size: Largest packet the server may send on those channels
         """
         # Create connection handler
         self._connection = SSHConnection(
@@ -43,7 +55,15 @@ class SSHManager:
             port=port,
             keepalive_interval=keepalive_interval,
             reconnect_attempts=reconnect_attempts,
-            connection_timeout=connection_timeout
+            connection_timeout=connection_timeout,
+            tcp_nodelay=tcp_nodelay,
+            keepalive_idle=keepalive_idle,
+            keepalive_intvl=keepalive_intvl,
+            keepalive_cnt=keepalive_cnt,
+            pool_connections=pool_connections,
+            reconnect_backoff_cap=reconnect_backoff_cap,
+            window_size=window_size,
+            max_packet_size=max_packet_size
         )
 
         # Create command executor
@@ -112,6 +132,8 @@ class SSHManager:
         if result:
             # Start output reader thread AFTER connection
             self._io.start_reader()
+            # Wait for initial output (welcome message + prompt)
+            self._io.wait_for_first_output(timeout=2.0)
         return result
 
     def disconnect(self) -> None:
@@ -127,6 +149,10 @@ class SSHManager:
         """Check if currently connected"""
         return self._connection.is_connected()
 
+    def is_local(self) -> bool:
+        """Check if connected to this machine as the current user"""
+        return self._connection.is_local()
+
     def get_connection_info(self) -> dict:
         """Get connection information"""
         return self._connection.get_connection_info()
@@ -135,6 +161,10 @@ class SSHManager:
         """Get SFTP client"""
         return self._connection.get_sftp()
 
+    def open_sftp(self):
+        """Open an additional SFTP client owned by the caller"""
+        return self._connection.open_sftp()
+
     def resize_pty(self, cols: int, rows: int) -> bool:
         """Resize the pseudo-terminal"""
         return self._connection.resize_pty(cols, rows)
@@ -148,6 +178,39 @@ class SSHManager:
         """Execute command using separate channel"""
         return self._command_executor.execute_simple(command, timeout)
 
+    @staticmethod
+    def execute_on_many(managers: List['SSHManager'], command: str, timeout: int = 10) -> List[str]:
+        """
+        Run the same command on several connected servers concurrently
+
+        Each server's execute_simple waits on its own socket in a worker
+        thread, so total time is the slowest server rather than the sum.
+
+        Args:
+            managers: Connected SSHManager instances
+            command: Command to execute
+            timeout: Per-server command timeout in seconds
+
+        Returns:
+            Command outputs in the order of managers ("" on failure) - by
+            position, so two managers for one host (other port or user)
+            keep separate results
+        """
+        if not managers:
+            return []
+
+        def run(manager):
+            try:
+                return manager.execute_simple(command, timeout)
+            except Exception as e:
+                logger.error(f"execute_on_many failed on "
+                             f"{manager.user}@{manager.host}:{manager.port}: {e}")
+                return ""
+
+        # Bounded to stay clear of sshd MaxStartups limits
+        with ThreadPoolExecutor(max_workers=min(32, len(managers))) as executor:
+            return list(executor.map(run, managers))
+
     # Delegate I/O methods
     def send_input(self, text: str) -> None:
         """Send input to shell"""
@@ -160,3 +223,7 @@ class SSHManager:
     def set_output_callback(self, callback: Callable[[str], None]) -> None:
         """Set callback function for output streaming"""
         self._io.set_output_callback(callback)
+
+    def set_output_callback_bytes(self, callback: Optional[Callable[[bytes], None]]) -> None:
+        """Set callback function for raw, undecoded output streaming"""
+        self._io.set_output_callback_bytes(callback)
@@ -0,0 +1,115 @@
+"""
+SSH Connection Pool
+Keeps authenticated SSH clients alive across server switches
+"""
+
+import paramiko
+import threading
+import logging
+from collections import OrderedDict, deque
+from typing import Deque, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (host, port, user, password) - password is part of the key so a client is
+# never handed to a connection configured with different credentials
+PoolKey = Tuple[str, int, str, str]
+
+# Idle clients kept per endpoint
+_MAX_PER_KEY = 4
+
+# Endpoints kept before the least recently used one is closed
+_MAX_KEYS = 8
+
+
+class SSHConnectionPool:
+    """
+    Process-wide pool of idle, authenticated SSH clients
+
+    Switching back to a recently used server reuses its transport instead
+    of repeating the TCP connect, key exchange and authentication.
+    """
+
+    _pool: "OrderedDict[PoolKey, Deque[paramiko.SSHClient]]" = OrderedDict()
+    _lock = threading.RLock()
+
+    @classmethod
+    def acquire(cls, key: PoolKey) -> Optional[paramiko.SSHClient]:
+        """
+        Take a live client for an endpoint
+
+        Args:
+            key: (host, port, user, password)
+
+        Returns:
+            Connected SSHClient, or None if none is pooled
+        """
+        with cls._lock:
+            clients = cls._pool.get(key)
+            if not clients:
+                return None
+            cls._pool.move_to_end(key)
+            while clients:
+                client = clients.pop()
+                if cls._is_alive(client):
+                    logger.info("Reusing pooled SSH connection to %s@%s:%s", key[2], key[0], key[1])
+                    return client
+                cls._close(client)
+            return None
+
+    @classmethod
+    def release(cls, key: PoolKey, client: paramiko.SSHClient) -> None:
+        """
+        Return a client to the pool (closed instead if dead or over capacity)
+
+        Args:
+            key: (host, port, user, password)
+            client: SSHClient previously connected to that endpoint
+        """
+        if not cls._is_alive(client):
+            cls._close(client)
+            return
+
+        evicted = []
+        with cls._lock:
+            clients = cls._pool.get(key)
+            if clients is None:
+                clients = cls._pool[key] = deque()
+            cls._pool.move_to_end(key)
+
+            if len(clients) >= _MAX_PER_KEY:
+                evicted.append(client)
+            else:
+                clients.append(client)
+
+            while len(cls._pool) > _MAX_KEYS:
+                _, old_clients = cls._pool.popitem(last=False)
+                evicted.extend(old_clients)
+
+        for old in evicted:
+            cls._close(old)
+
+    @classmethod
+    def close_all(cls) -> None:
+        """Close every pooled client"""
+        with cls._lock:
+            clients = [c for group in cls._pool.values() for c in group]
+            cls._pool.clear()
+
+        for client in clients:
+            cls._close(client)
+
+        if clients:
+            logger.info(f"Closed {len(clients)} pooled SSH connection(s)")
+
+    @staticmethod
+    def _is_alive(client: paramiko.SSHClient) -> bool:
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+    @staticmethod
+    def _close(client: paramiko.SSHClient) -> None:
+        try:
+            client.close()
+        except Exception:
+            pass
@@ -3,16 +3,51 @@ Conversation state management for shared terminal state
 Phase 1 Enhanced: Conversation workflow automation
 """
 
+import functools
 import logging
 import re
+import sys
 import time
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Valid machine-id is exactly 32 lowercase hex characters
+_MACHINE_ID_RE = re.compile(r'^[a-f0-9]{32}\Z')
+
+
+@functools.lru_cache(maxsize=256)
+def _is_valid_machine_id(machine_id: str) -> bool:
+    """Pure machine_id validation, memoized - the same IDs recur all session"""
+    if not machine_id:
+        return False
+
+    # Check if it's a fallback ID
+    if machine_id.startswith(('unknown-', 'error-')):
+        logger.debug(f"Invalid machine_id: starts with fallback prefix")
+        return False
+
+    # Valid machine-id is exactly 32 hex characters
+    if not _MACHINE_ID_RE.match(machine_id):
+        logger.debug(f"Invalid machine_id: not 32 hex chars")
+        return False
+
+    # Additional checks: machine-id shouldn't be all zeros or all f's
+    if machine_id == '0' * 32 or machine_id == 'f' * 32:
+        logger.debug(f"Invalid machine_id: suspicious pattern (all zeros or f's)")
+        return False
+
+    return True
+
 
 class ConversationState:
-    """Manages conversation state and server tracking"""
+    """
+    Manages conversation state and server tracking
+
+    machine_id values are interned with sys.intern before being stored, so
+    the per-machine dicts share one string object per machine and key
+    comparisons short-circuit on identity.
+    """
 
     def __init__(self):
         """Initialize conversation state"""
@@ -25,9 +60,9 @@ class ConversationState:
         self.conversation_modes: Dict[str, Optional[str]] = {}  # machine_id -> mode
 
         # NEW: Track sudo preauth timestamps per server
-        self.sudo_preauth_timestamps: Dict[str, float] = {}  # machine_id -> timestamp
+        self.sudo_preauth_timestamps: Dict[str, float] = {}  # machine_id -> time.monotonic()
 
-        self.machine_id_cache: Dict[str, str] = {}           # "host:port:user" -> "machine_id"
+        self.machine_id_cache: Dict[Tuple[str, int, str], str] = {}  # (host, port, user) -> "machine_id"
 
     def set_current_server(self, machine_id: str) -> None:
         """
@@ -36,7 +71,7 @@ class ConversationState:
         Args:
             machine_id: Database server ID
         """
-        self.current_machine_id = machine_id
+        self.current_machine_id = sys.intern(machine_id) if machine_id else machine_id
         logger.debug(f"Current machine set to: {machine_id}")
 
     def pause_conversation(self, machine_id: str, database) -> None:
@@ -63,7 +98,7 @@ class ConversationState:
             conversation_id: Conversation ID to resume
             database: DatabaseManager instance
         """
-        self.active_conversations[machine_id] = conversation_id
+        self.active_conversations[sys.intern(machine_id)] = conversation_id
         if database:
             database.resume_conversation(conversation_id)
         logger.info(f"Resumed conversation {conversation_id} for machine {machine_id}")
@@ -88,6 +123,7 @@ class ConversationState:
             machine_id: Machine ID
             conversation_id: Conversation ID
         """
+        machine_id = sys.intern(machine_id)
         self.active_conversations[machine_id] = conversation_id
         self.conversation_modes[machine_id] = "in-conversation"
         logger.debug(f"Set active conversation {conversation_id} for machine {machine_id}")
@@ -150,24 +186,23 @@ class ConversationState:
             return True  # No machine context, preauth needed
 
         last_preauth = self.sudo_preauth_timestamps.get(self.current_machine_id)
-        if not last_preauth:
+        if last_preauth is None:
             return True  # Never preauthenticated
 
-        elapsed = time.time() - last_preauth
+        elapsed = time.monotonic() - last_preauth
         return elapsed >= validity_seconds
 
     def mark_sudo_preauth(self) -> None:
         """Mark that sudo preauth was successful for current machine"""
         if self.current_machine_id:
-            self.sudo_preauth_timestamps[self.current_machine_id] = time.time()
+            self.sudo_preauth_timestamps[self.current_machine_id] = time.monotonic()
             logger.debug(f"Marked sudo preauth for machine {self.current_machine_id}")
     # ========== END NEW METHODS ==========
 
 
     def get_cached_machine_id(self, host: str, port: int, user: str) -> Optional[str]:
         """Get cached machine_id for connection"""
-        cache_key = f"{host}:{port}:{user}"
-        return self.machine_id_cache.get(cache_key)
+        return self.machine_id_cache.get((host, port, user))
 
     def cache_machine_id(self, host: str, port: int, user: str, machine_id: str) -> None:
         """Cache machine_id for connection (only if valid)"""
@@ -176,9 +211,8 @@ class ConversationState:
             logger.warning(f"Refusing to cache invalid machine_id: {machine_id}")
             return
 
-        cache_key = f"{host}:{port}:{user}"
-        self.machine_id_cache[cache_key] = machine_id
-        logger.debug(f"Cached machine_id for {cache_key}: {machine_id[:16]}...")
+        self.machine_id_cache[(host, port, user)] = sys.intern(machine_id)
+        logger.debug(f"Cached machine_id for {host}:{port}:{user}: {machine_id[:16]}...")
 
     def clear_machine_id_cache(self, host: str = None, port: int = None, user: str = None) -> None:
         """Clear machine_id cache (all or specific connection)"""
@@ -186,10 +220,8 @@ class ConversationState:
             self.machine_id_cache.clear()
             logger.debug("Cleared all machine_id cache")
         else:
-            cache_key = f"{host}:{port}:{user}"
-            if cache_key in self.machine_id_cache:
-                del self.machine_id_cache[cache_key]
-                logger.debug(f"Cleared machine_id cache for {cache_key}")
+            if self.machine_id_cache.pop((host, port, user), None) is not None:
+                logger.debug(f"Cleared machine_id cache for {host}:{port}:{user}")
 
     def get_auto_conversation_id(self) -> Optional[int]:
         """
@@ -198,12 +230,13 @@ class ConversationState:
         Returns:
             Conversation ID if in "in-conversation" mode, None otherwise
         """
-        if not self.current_machine_id:
+        machine_id = self.current_machine_id
+        if not machine_id:
             return None
 
-        mode = self.conversation_modes.get(self.current_machine_id)
-        if mode == "in-conversation":
-            return self.active_conversations.get(self.current_machine_id)
+        # Interned str keys already hash once (cached) and compare by identity
+        if self.conversation_modes.get(machine_id) == "in-conversation":
+            return self.active_conversations.get(machine_id)
 
         return None
 
@@ -218,22 +251,4 @@ class ConversationState:
         Returns:
             True if valid, False if fallback/invalid
         """
-        if not machine_id:
-            return False
-
-        # Check if it's a fallback ID
-        if machine_id.startswith(('unknown-', 'error-')):
-            logger.debug(f"Invalid machine_id: starts with fallback prefix")
-            return False
-
-        # Valid machine-id is exactly 32 hex characters
-        if not re.match(r'^[a-f0-9]{32}$', machine_id):
-            logger.debug(f"Invalid machine_id: not 32 hex chars")
-            return False
-
-        # Additional checks: machine-id shouldn't be all zeros or all f's
-        if machine_id == '0' * 32 or machine_id == 'f' * 32:
-            logger.debug(f"Invalid machine_id: suspicious pattern (all zeros or f's)")
-            return False
-
-        return True
+        return _is_valid_machine_id(machine_id)
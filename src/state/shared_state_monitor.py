@@ -4,11 +4,16 @@ Background monitoring of command execution
 """
 
 import asyncio
+import concurrent.futures
 import logging
 import time
 
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for one prompt check on the shared loop; a check that
+# hangs must not block this monitor thread (and the loop's others) forever
+_COMPLETION_CHECK_TIMEOUT = 5.0
+
 
 def monitor_command(command_id: str, shared_state):
     """
@@ -42,18 +47,35 @@ def monitor_command(command_id: str, shared_state):
     # Add this BEFORE the while loop starts
     last_sudo_response_line_count = 0  # Track buffer size when we last responded to sudo
 
+    # Output seen at the previous tick: (total_lines_added, current_output).
+    # total_lines_added keeps growing once the line deque is full, and the
+    # partial line catches prompts that arrive without a trailing newline.
+    last_seen_output = None
+
+    # Invariant for the lifetime of this command - bind once outside the loop
+    buf = shared_state.buffer
+    ssh = shared_state.ssh_manager
+    is_sudo_prompt = shared_state.prompt_detector.is_sudo_prompt
+    check_completion = shared_state.prompt_detector.check_completion
+    monitor_loop = shared_state.monitor_loop
+
     while state.is_running():
         time.sleep(check_interval)
 
+        output_buffer = buf.buffer
+        seen_output = (output_buffer.total_lines_added, output_buffer.current_output)
+        output_changed = seen_output != last_seen_output
+        last_seen_output = seen_output
+
         # NEW CODE - Check for sudo password prompt
-        if shared_state.prompt_detector.is_sudo_prompt(shared_state.buffer.buffer):
-            current_line_count = len(shared_state.buffer.buffer.lines)
+        if output_changed and is_sudo_prompt(output_buffer):
+            current_line_count = len(output_buffer.lines)
 
             # Only respond if buffer has grown since last response (new prompt, not same one)
             if current_line_count > last_sudo_response_line_count:
-                if shared_state.ssh_manager.password:
+                if ssh.password:
                     logger.info(f"Auto-responding to sudo password prompt, current_line_count={current_line_count}, last_sudo_response_line_count={last_sudo_response_line_count} ")
-                    shared_state.ssh_manager.shell.send(shared_state.ssh_manager.password + '\n')
+                    ssh.shell.send(ssh.password + '\n')
                     last_sudo_response_line_count = current_line_count  # Remember this line count
                     time.sleep(0.5)  # Wait for password to be processed
                     continue  # Skip to next iteration
@@ -61,37 +83,49 @@ def monitor_command(command_id: str, shared_state):
 
         # Check for max monitoring time (1 hour default)
         if state.duration() >= max_monitoring_time:
-            buffer_end_line = len(shared_state.buffer.buffer.lines)
+            buffer_end_line = len(output_buffer.lines)
             state.mark_max_timeout(buffer_end_line)
             logger.warning(f"Command {command_id} exceeded max monitoring time ({max_monitoring_time}s)")
             break
 
+        # Nothing new since the last check - detector result cannot change
+        if not output_changed:
+            continue
+
         # Check for prompt in buffer
         try:
-            # Run async check in sync context
-            loop = asyncio.new_event_loop()
-            completed, reason = loop.run_until_complete(
-                shared_state.prompt_detector.check_completion(
-                    shared_state.buffer,
+            # Run async check on the shared background loop
+            future = asyncio.run_coroutine_threadsafe(
+                check_completion(
+                    buf,
                     prompt_pattern
-                )
+                ),
+                monitor_loop
             )
-            loop.close()
+            try:
+                completed, reason = future.result(timeout=_COMPLETION_CHECK_TIMEOUT)
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                logger.warning(f"Prompt check for command {command_id} timed out")
+                # Not completed - check again on the next tick even if no
+                # new output arrives
+                last_seen_output = None
+                continue
 
             if completed:
                 # Prompt detected! Check if it was due to Ctrl+C
-                buffer_end_line = len(shared_state.buffer.buffer.lines)
+                buffer_end_line = len(output_buffer.lines)
 
                 # Check recent output for ^C (Ctrl+C character)
                 # Get last few lines before prompt
-                recent_output = shared_state.buffer.buffer.get_text(
+                recent_output = output_buffer.get_text(
                     start=max(0, buffer_end_line - 5),
                     end=buffer_end_line
                 )
 
                 # Also check current_output (partial line with prompt)
-                if hasattr(shared_state.buffer.buffer, 'current_output'):
-                    recent_output += shared_state.buffer.buffer.current_output
+                if hasattr(output_buffer, 'current_output'):
+                    recent_output += output_buffer.current_output
 
                 # Detect Ctrl+C in output
                 if '^C' in recent_output:
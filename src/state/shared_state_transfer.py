@@ -3,13 +3,34 @@ SFTP transfer tracking for shared terminal state
 Phase 2.5: Transfer progress monitoring
 """
 
+import heapq
 import logging
 import threading
 import time
-from typing import Dict
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Optional Cython lock with a cheaper uncontended acquire; progress callbacks
+# take _transfer_lock many times per second during SFTP transfers
+try:
+    from fastrlock.rlock import FastRLock as _TransferLock
+except ImportError:
+    _TransferLock = threading.Lock
+
+# Seconds a completed transfer stays visible before it is dropped
+_CLEANUP_DELAY = 10
+
+# Progress broadcasts per transfer are sent at most every _BROADCAST_INTERVAL
+# seconds, unless progress moved by at least _BROADCAST_MIN_PERCENT
+_BROADCAST_INTERVAL = 0.1
+_BROADCAST_MIN_PERCENT = 1.0
+
+# A transfer poller silent for longer than this is treated as gone, so
+# wait_until_observed returns at once instead of waiting on nobody
+_OBSERVER_IDLE = 2.0
+
 
 class TransferState:
     """Manages SFTP transfer tracking and progress updates"""
@@ -18,7 +39,21 @@ class TransferState:
         """Initialize transfer state"""
         # SFTP Transfer tracking (Phase 2.5)
         self.active_transfers: Dict[str, Dict] = {}  # transfer_id -> progress_dict
-        self._transfer_lock = threading.Lock()
+        self._transfer_lock = _TransferLock()
+        self._transfers_view = MappingProxyType(self.active_transfers)  # read-only live view
+        self._last_broadcast: Dict[str, Tuple[float, float]] = {}  # transfer_id -> (time, percent)
+
+        # Pending cleanups as a (deadline, transfer_id) heap, served by one
+        # janitor thread started on first use
+        self._cleanup_heap: List[Tuple[float, str]] = []
+        self._cleanup_cv = threading.Condition()
+        self._cleanup_thread: Optional[threading.Thread] = None
+
+        # Phase of each transfer as last fetched by the web terminal, so a
+        # worker can wait until a short phase has actually been shown
+        self._observed_phase: Dict[str, Optional[str]] = {}
+        self._observed_cv = threading.Condition()
+        self._last_observed = 0.0
 
     def start_transfer(self, transfer_id: str, progress_dict: Dict, web_server=None) -> None:
         """Register a new SFTP transfer"""
@@ -28,33 +63,56 @@ class TransferState:
         logger.info(f"Started tracking transfer {transfer_id}")
 
         # Broadcast to web terminal if available
-        if web_server:
+        if web_server is not None:
             try:
-                import asyncio
-                asyncio.create_task(
-                    web_server.broadcast_transfer_update(transfer_id, progress_dict)
-                )
+                web_server.schedule_transfer_update(transfer_id, progress_dict)
             except Exception as e:
                 logger.error(f"Failed to broadcast transfer start: {e}")
 
     def update_transfer_progress(self, transfer_id: str, progress_dict: Dict, web_server=None) -> None:
-        """Update progress for an active transfer"""
-        with self._transfer_lock:
-            if transfer_id in self.active_transfers:
-                self.active_transfers[transfer_id].update(progress_dict)
-            else:
-                self.active_transfers[transfer_id] = progress_dict
+        """
+        Update progress for an active transfer
+
+        Invariant: each transfer_id has a single producer (its own progress
+        callback), and dict.update on an existing entry is atomic under the
+        GIL, so the common path skips the lock. The lock is only taken when
+        the key set changes.
+        """
+        existing = self.active_transfers.get(transfer_id)
+        if existing is not None:
+            existing.update(progress_dict)
+        else:
+            with self._transfer_lock:
+                if transfer_id in self.active_transfers:
+                    self.active_transfers[transfer_id].update(progress_dict)
+                else:
+                    self.active_transfers[transfer_id] = progress_dict
 
-        # Broadcast to web terminal if available
-        if web_server:
+        # Broadcast to web terminal if available (throttled)
+        if web_server is not None and self._should_broadcast(transfer_id, progress_dict):
             try:
-                import asyncio
-                asyncio.create_task(
-                    web_server.broadcast_transfer_update(transfer_id, progress_dict)
-                )
+                web_server.schedule_transfer_update(transfer_id, progress_dict)
             except Exception as e:
                 logger.debug(f"Could not broadcast transfer update: {e}")
 
+    def _should_broadcast(self, transfer_id: str, progress_dict: Dict) -> bool:
+        """
+        Rate-limit progress broadcasts for a transfer
+
+        Returns:
+            True if enough time passed or progress moved enough since the
+            last broadcast (and records this one), False otherwise
+        """
+        now = time.monotonic()
+        percent = progress_dict.get('percent_complete') or 0
+        last = self._last_broadcast.get(transfer_id)
+        if (last is not None
+                and now - last[0] < _BROADCAST_INTERVAL
+                and abs(percent - last[1]) < _BROADCAST_MIN_PERCENT):
+            return False
+        self._last_broadcast[transfer_id] = (now, percent)
+        return True
+
     def complete_transfer(self, transfer_id: str, result: Dict, web_server=None) -> None:
         """Mark a transfer as complete"""
         with self._transfer_lock:
@@ -66,31 +124,89 @@ class TransferState:
                 })
 
         logger.info(f"Transfer {transfer_id} completed")
+        self._last_broadcast.pop(transfer_id, None)
 
         # Broadcast final update
-        if web_server:
+        if web_server is not None:
             try:
-                import asyncio
-                asyncio.create_task(
-                    web_server.broadcast_transfer_update(
-                        transfer_id,
-                        self.active_transfers.get(transfer_id, {})
-                    )
+                web_server.schedule_transfer_update(
+                    transfer_id,
+                    self.active_transfers.get(transfer_id, {})
                 )
             except Exception as e:
                 logger.error(f"Failed to broadcast transfer completion: {e}")
 
         # Schedule cleanup after 10 seconds
-        def cleanup():
-            time.sleep(10)
-            with self._transfer_lock:
-                if transfer_id in self.active_transfers:
-                    del self.active_transfers[transfer_id]
-
-        cleanup_thread = threading.Thread(target=cleanup, daemon=True)
-        cleanup_thread.start()
+        self._schedule_cleanup(transfer_id)
+
+    def _schedule_cleanup(self, transfer_id: str) -> None:
+        """Queue a transfer for removal after _CLEANUP_DELAY seconds"""
+        with self._cleanup_cv:
+            heapq.heappush(self._cleanup_heap, (time.monotonic() + _CLEANUP_DELAY, transfer_id))
+            if self._cleanup_thread is None:
+                self._cleanup_thread = threading.Thread(
+                    target=self._cleanup_worker,
+                    name="transfer-cleanup",
+                    daemon=True
+                )
+                self._cleanup_thread.start()
+            self._cleanup_cv.notify()
+
+    def _cleanup_worker(self) -> None:
+        """Janitor loop: drop completed transfers as their deadlines pass"""
+        while True:
+            with self._cleanup_cv:
+                while not self._cleanup_heap:
+                    self._cleanup_cv.wait()
+                deadline, transfer_id = self._cleanup_heap[0]
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    self._cleanup_cv.wait(delay)
+                    continue
+                heapq.heappop(self._cleanup_heap)
 
-    def get_active_transfers(self) -> Dict[str, Dict]:
-        """Get all active transfers"""
+            with self._transfer_lock:
+                self.active_transfers.pop(transfer_id, None)
+            with self._observed_cv:
+                self._observed_phase.pop(transfer_id, None)
+
+    def mark_observed(self, transfers: Mapping[str, Dict]) -> None:
+        """Record the transfer phases a client has just been served"""
+        with self._observed_cv:
+            for transfer_id, progress in transfers.items():
+                self._observed_phase[transfer_id] = progress.get('current_phase')
+            self._last_observed = time.monotonic()
+            self._observed_cv.notify_all()
+
+    def wait_until_observed(self, transfer_id: str, phase: Optional[str], timeout: float) -> bool:
+        """
+        Block until a client has been served a transfer in the given phase
+
+        Args:
+            transfer_id: Transfer identifier
+            phase: Phase that should have been shown
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True once observed; False on timeout or when no client is polling
+        """
+        with self._observed_cv:
+            if time.monotonic() - self._last_observed > _OBSERVER_IDLE:
+                return False
+            return self._observed_cv.wait_for(
+                lambda: self._observed_phase.get(transfer_id) == phase, timeout
+            )
+
+    def get_active_transfers(self) -> Mapping[str, Dict]:
+        """
+        Get all active transfers as a read-only live view (no copy)
+
+        Use snapshot_transfers() when the result is iterated while transfers
+        may start or finish, or has to be serialized.
+        """
+        return self._transfers_view
+
+    def snapshot_transfers(self) -> Dict[str, Dict]:
+        """Get a point-in-time copy of all active transfers"""
         with self._transfer_lock:
             return self.active_transfers.copy()
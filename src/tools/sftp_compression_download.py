@@ -4,15 +4,27 @@ Complete workflow for downloading and extracting directories
 """
 
 import os
+import gzip
+import shlex
 import tarfile
 import tempfile
 import time
 import logging
 from typing import List
 from datetime import datetime
+from tools.sftp_compression_tar import TAR_COPY_BUFSIZE, TRANSFER_COMPRESSION_LEVEL
 
 logger = logging.getLogger(__name__)
 
+# Read/write buffer for the downloaded archive
+_ARCHIVE_BUFSIZE = 1024 * 1024
+
+# Minimum seconds between transfer progress updates (20 Hz)
+_PROGRESS_INTERVAL = 0.05
+
+# SFTP read size (matches paramiko's own getfo block size)
+_SFTP_READ_SIZE = 32768
+
 
 def download_and_extract(
     ssh_manager,
@@ -20,7 +32,8 @@ def download_and_extract(
     remote_dir: str,
     local_dir: str,
     exclude_patterns: List[str] = None,
-    tracker=None
+    tracker=None,
+    compression_level: int = TRANSFER_COMPRESSION_LEVEL
 ) -> dict:
     """
     Complete compressed download workflow:
@@ -36,17 +49,21 @@ def download_and_extract(
         local_dir: Local destination directory
         exclude_patterns: Patterns to exclude
         tracker: Optional progress tracker
+        compression_level: pigz level 1-9 when the remote has pigz (fast by
+            default - the archive is only unpacked here)
 
     Returns:
         Dict with complete transfer statistics
     """
 
-    start_time = datetime.now()
+    start_time = time.perf_counter()
 
     # Generate unique temp filenames
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     remote_archive = f"/tmp/download_{timestamp}.tar.gz"
-    local_archive = tempfile.mktemp(suffix=f'_download_{timestamp}.tar.gz')
+    # mkstemp creates the file atomically, so the name cannot be raced
+    fd, local_archive = tempfile.mkstemp(suffix=f'_download_{timestamp}.tar.gz')
+    os.close(fd)
 
     try:
         # Step 1: Create tarball on remote
@@ -58,20 +75,37 @@ def download_and_extract(
         exclude_args = ""
         if exclude_patterns:
             for pattern in exclude_patterns:
-                exclude_args += f" --exclude='{pattern}'"
-
-        tar_cmd = f"tar -czf {remote_archive}{exclude_args} -C {remote_dir} ."
-
-        compress_start = datetime.now()
+                exclude_args += f" --exclude={shlex.quote(pattern)}"
+
+        source = shlex.quote(remote_dir)
+        archive = shlex.quote(remote_archive)
+
+        # Compress with pigz on all remote cores when it is installed, then
+        # print the archive size in the same round trip. A pipe exits with
+        # pigz's status, and the remote shell may be a POSIX sh without
+        # pipefail, so tar's own status is passed out on fd 3 and checked too
+        tar_cmd = (
+            f"if command -v pigz >/dev/null 2>&1; then "
+            f"tar_status=$({{ {{ tar -cf -{exclude_args} -C {source} .; echo $? >&3; }} "
+            f"| pigz -{compression_level} > {archive}; }} 3>&1) && [ \"$tar_status\" = 0 ]; "
+            f"else tar -czf {archive}{exclude_args} -C {source} .; fi "
+            f"&& stat -c %s {archive}"
+        )
+
+        compress_start = time.perf_counter()
         result = ssh_manager.execute_command(tar_cmd, timeout=600)
-        compress_duration = (datetime.now() - compress_start).total_seconds()
+        compress_duration = time.perf_counter() - compress_start
 
         if result.exit_code != 0:
             raise Exception(f"Remote tar creation failed: {result.stderr}")
 
-        # Get archive size
-        stat_result = ssh_manager.execute_command(f"stat -c %s {remote_archive}", timeout=10)
-        compressed_size = int(stat_result.stdout.strip()) if stat_result.stdout.strip().isdigit() else 0
+        # Archive size is the last line printed by stat; fall back to the
+        # already-open SFTP channel rather than another SSH command
+        size_output = result.stdout.strip().rsplit('\n', 1)[-1]
+        if size_output.isdigit():
+            compressed_size = int(size_output)
+        else:
+            compressed_size = sftp.stat(remote_archive).st_size
 
         logger.info(f"Remote tarball created in {compress_duration:.1f}s ({compressed_size/(1024*1024):.1f}MB)")
 
@@ -90,25 +124,51 @@ def download_and_extract(
                 completed_files=0
             )
 
-        download_start = datetime.now()
+        download_start = time.perf_counter()
 
         # Use SFTP with progress callback
+        archive_name = os.path.basename(remote_archive)
+        last_progress = [0.0]
+
         def download_callback(bytes_transferred, total_bytes):
             if tracker and bytes_transferred > 0:
+                # Fires per chunk - only pass it on at _PROGRESS_INTERVAL
+                now = time.perf_counter()
+                if now - last_progress[0] < _PROGRESS_INTERVAL and bytes_transferred < total_bytes:
+                    return
+                last_progress[0] = now
+
                 # NOW we update percentage - actual file transfer
                 tracker.update(
                     phase="transferring",
                     status="in_progress",
                     transferred_bytes=bytes_transferred,
                     completed_files=0,
-                    current_file=os.path.basename(remote_archive)
+                    current_file=archive_name
                 )
 
-        sftp.get(remote_archive, local_archive, callback=download_callback)
-        download_duration = (datetime.now() - download_start).total_seconds()
-
-        logger.info(f"Download completed in {download_duration:.1f}s "
-                   f"({compressed_size/(1024*1024)/download_duration:.1f} MB/s)")
+        # Prefetch issues the read requests ahead of time so the download is
+        # not bound to one round trip per 32 KiB block. The size is already
+        # known, so skip the extra stat round trip sftp.getfo() would make
+        with sftp.open(remote_archive, 'rb') as remote_file, \
+                open(local_archive, 'wb', buffering=_ARCHIVE_BUFSIZE) as local_file:
+            remote_file.prefetch(compressed_size)
+            received = 0
+            while True:
+                data = remote_file.read(_SFTP_READ_SIZE)
+                if not data:
+                    break
+                local_file.write(data)
+                received += len(data)
+                download_callback(received, compressed_size)
+
+        if received != compressed_size:
+            raise IOError(f"Archive size mismatch: got {received} of {compressed_size} bytes")
+        download_duration = time.perf_counter() - download_start
+
+        # Small archives can finish within the timer resolution
+        mbps = compressed_size / (1024*1024) / max(download_duration, 1e-6)
+        logger.info(f"Download completed in {download_duration:.1f}s ({mbps:.1f} MB/s)")
 
         # Transfer complete - set to 100%
         if tracker:
@@ -126,14 +186,19 @@ def download_and_extract(
 
         os.makedirs(local_dir, exist_ok=True)
 
-        extract_start = datetime.now()
-        with tarfile.open(local_archive, 'r:gz') as tar:
+        extract_start = time.perf_counter()
+        # Sequential stream ('r|'): 1 MiB buffered reads feed the gzip
+        # decompressor, and tarfile never seeks back in the archive
+        with open(local_archive, 'rb', buffering=_ARCHIVE_BUFSIZE) as raw, \
+                gzip.GzipFile(fileobj=raw, mode='rb') as gz, \
+                tarfile.open(fileobj=gz, mode='r|', copybufsize=TAR_COPY_BUFSIZE) as tar:
             tar.extractall(local_dir)
-        extract_duration = (datetime.now() - extract_start).total_seconds()
+        extract_duration = time.perf_counter() - extract_start
 
         logger.info(f"Extraction completed in {extract_duration:.1f}s")
         if tracker:
-            time.sleep(1.0)  # 1 second delay
+            # Until the web terminal has shown the extraction phase (1s at most)
+            tracker.wait_until_observed(timeout=1.0)
 
         # Extraction phase - DON'T change transferred_bytes (stays at 100% from transfer)
         # Phase display will show "Extracting..." with 100%
@@ -146,9 +211,9 @@ def download_and_extract(
             os.remove(local_archive)
 
         # Remove remote archive
-        ssh_manager.execute_command(f"rm {remote_archive}", timeout=30)
+        ssh_manager.execute_command(f"rm -f {archive}", timeout=30)
 
-        total_duration = (datetime.now() - start_time).total_seconds()
+        total_duration = time.perf_counter() - start_time
 
         # Final update: completed
         if tracker:
@@ -178,7 +243,7 @@ def download_and_extract(
             os.remove(local_archive)
 
         try:
-            ssh_manager.execute_command(f"rm -f {remote_archive}", timeout=10)
+            ssh_manager.execute_command(f"rm -f {shlex.quote(remote_archive)}", timeout=10)
         except:
             pass
 
@@ -4,15 +4,69 @@ Complete workflow for compressing and uploading directories
 """
 
 import os
-import tempfile
+import queue
+import shlex
+import threading
 import time
 import logging
 from typing import List, Optional
 from datetime import datetime
-from tools.sftp_compression_tar import create_tarball, extract_tarball_via_ssh
+from tools.sftp_compression_tar import (
+    TRANSFER_COMPRESSION_LEVEL, create_tarball, extract_tarball_via_ssh
+)
 
 logger = logging.getLogger(__name__)
 
+# Archive chunk handed from the compressing thread to the upload - each
+# chunk goes out as a run of pipelined SFTP write requests
+_ARCHIVE_BUFSIZE = 1024 * 1024
+
+# Minimum seconds between transfer progress updates (20 Hz)
+_PROGRESS_INTERVAL = 0.05
+
+# Archive chunks (of _ARCHIVE_BUFSIZE) buffered between the compressing
+# thread and the upload - bounds memory when one side is slower
+_UPLOAD_QUEUE_CHUNKS = 8
+
+
+def _put_chunk(chunks: queue.Queue, chunk: Optional[bytes], abort: threading.Event) -> bool:
+    """Queue a chunk, giving up if the upload was aborted; returns False then"""
+    while not abort.is_set():
+        try:
+            chunks.put(chunk, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class _QueueWriter:
+    """File-like sink that hands the archive to the upload thread in chunks"""
+
+    def __init__(self, chunks: queue.Queue, abort: threading.Event):
+        self._chunks = chunks
+        self._abort = abort
+        self._buffer = bytearray()
+
+    def write(self, data) -> int:
+        self._buffer += data
+        if len(self._buffer) >= _ARCHIVE_BUFSIZE:
+            self._flush_chunk()
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        if self._buffer:
+            self._flush_chunk()
+
+    def _flush_chunk(self) -> None:
+        # Hand the buffer itself over and start a new one - no copy
+        chunk, self._buffer = self._buffer, bytearray()
+        if not _put_chunk(self._chunks, chunk, self._abort):
+            raise Exception("Upload aborted")
+
 
 def compress_and_upload(
     ssh_manager,
@@ -21,12 +75,13 @@ def compress_and_upload(
     remote_dir: str,
     exclude_patterns: List[str] = None,
     chmod_dirs: Optional[int] = None,
-    tracker=None
+    tracker=None,
+    compression_level: int = TRANSFER_COMPRESSION_LEVEL
 ) -> dict:
     """
     Complete compressed upload workflow:
-    1. Create local tar.gz
-    2. Upload via SFTP
+    1. Create tar.gz
+    2. Upload via SFTP as it is produced (no local temp file)
     3. Extract on remote
     4. Cleanup temporary files
 
@@ -38,31 +93,23 @@ def compress_and_upload(
         exclude_patterns: Patterns to exclude
         chmod_dirs: Optional permissions for directories
         tracker: Optional progress tracker
+        compression_level: gzip level 1-9 (fast by default - the archive is
+            only unpacked on the other side)
 
     Returns:
         Dict with complete transfer statistics
     """
 
-    start_time = datetime.now()
+    start_time = time.perf_counter()
 
     # Generate unique temp filenames
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    local_archive = tempfile.mktemp(suffix=f'_upload_{timestamp}.tar.gz')
     remote_archive = f"/tmp/upload_{timestamp}.tar.gz"
 
     try:
-        # Step 1: Create tarball
-        logger.info("Step 1/4: Creating local tarball...")
-        if tracker:
-            tracker.update(phase="compressing", status="in_progress")
-
-        tar_info = create_tarball(local_dir, local_archive, exclude_patterns, tracker=tracker)
-
-        # Compression complete - DON'T update transferred_bytes (stays at 0%)
-        # Phase display will show "Compressing..." with 0%
-
-        # Step 2: Upload tarball
-        logger.info("Step 2/4: Uploading tarball...")
+        # Steps 1+2: Compress straight into the remote archive - compression
+        # and upload overlap and nothing is written to local disk
+        logger.info("Step 1-2/4: Compressing and uploading tarball...")
         if tracker:
             # FIX: Reset completed_files to 0 when switching to transfer phase
             # Now we're transferring 1 file (the archive), not the original file count
@@ -73,26 +120,79 @@ def compress_and_upload(
                 completed_files=0
             )
 
-        upload_start = datetime.now()
+        upload_start = time.perf_counter()
 
         # Use SFTP with progress callback
 
-        def upload_callback(bytes_transferred, total_bytes):
+        archive_name = os.path.basename(remote_archive)
+        last_progress = [0.0]
+
+        def upload_callback(bytes_transferred):
             if tracker and bytes_transferred > 0:
+                # Fires per chunk - only pass it on at _PROGRESS_INTERVAL
+                now = time.perf_counter()
+                if now - last_progress[0] < _PROGRESS_INTERVAL:
+                    return
+                last_progress[0] = now
+
                 # NOW we update percentage - actual file transfer
                 tracker.update(
                     phase="transferring",
                     status="in_progress",
                     transferred_bytes=bytes_transferred,
                     completed_files=0,
-                    current_file=os.path.basename(remote_archive)
+                    current_file=archive_name
                 )
 
-        sftp.put(local_archive, remote_archive, callback=upload_callback)
-        upload_duration = (datetime.now() - upload_start).total_seconds()
-
-        logger.info(f"Upload completed in {upload_duration:.1f}s "
-                   f"({tar_info['compressed_size']/(1024*1024)/upload_duration:.1f} MB/s)")
+        # Compression runs in its own thread and feeds a bounded queue, so the
+        # wall time is max(compress, upload) rather than their sum
+        chunks = queue.Queue(maxsize=_UPLOAD_QUEUE_CHUNKS)
+        abort = threading.Event()
+        produced = {}
+
+        def produce():
+            writer = _QueueWriter(chunks, abort)
+            try:
+                produced['tar_info'] = create_tarball(
+                    local_dir, writer, exclude_patterns,
+                    compression_level=compression_level
+                )
+                writer.close()
+            except Exception as e:
+                produced['error'] = e
+            finally:
+                _put_chunk(chunks, None, abort)  # End of archive
+
+        producer = threading.Thread(target=produce, name="tarball-producer", daemon=True)
+        producer.start()
+        try:
+            # Unbuffered: chunks are already large, and the SFTP layer slices
+            # them into requests through a memoryview instead of copying them
+            # into its own write buffer first
+            with sftp.open(remote_archive, 'wb', bufsize=0) as remote_file:
+                # Writes don't wait for their acks; a failed write raises on close
+                remote_file.set_pipelined(True)
+                bytes_sent = 0
+                while True:
+                    chunk = chunks.get()
+                    if chunk is None:
+                        break
+                    remote_file.write(chunk)
+                    bytes_sent += len(chunk)
+                    upload_callback(bytes_sent)
+        finally:
+            # Unblocks the producer if the upload failed part way
+            abort.set()
+            producer.join()
+
+        if 'error' in produced:
+            raise produced['error']
+        tar_info = produced['tar_info']
+        upload_duration = time.perf_counter() - upload_start
+
+        # Small archives can finish within the timer resolution
+        mbps = tar_info['compressed_size'] / (1024*1024) / max(upload_duration, 1e-6)
+        logger.info(f"Upload completed in {upload_duration:.1f}s ({mbps:.1f} MB/s)")
 
         # Transfer complete - set to 100%
         if tracker:
@@ -103,11 +203,11 @@ def compress_and_upload(
                 completed_files=1
             )
 
-        # Step 3: Extract on remote
+        # Step 3: Extract on remote (the archive is removed in the same command)
         logger.info("Step 3/4: Extracting on remote...")
         extract_info = extract_tarball_via_ssh(
             ssh_manager, remote_archive, remote_dir,
-            cleanup_archive=False,
+            cleanup_archive=True,
             tracker=tracker
         )
 
@@ -117,24 +217,18 @@ def compress_and_upload(
 
         # Extraction phase - DON'T change transferred_bytes (stays at 100% from transfer)
         # Phase display will show "Extracting..." with 100%
-        # ✅ ADD THIS - Give web terminal time to poll and display extraction phase
+        # Wait until the web terminal has polled and displayed the extraction phase
 
         if tracker:
-            time.sleep(1.0)  # 1 second delay to ensure extraction phase is visible
+            tracker.wait_until_observed(timeout=1.0)
 
         # Step 4: Set permissions on remote directory if requested
         if chmod_dirs is not None:
             logger.info("Step 4/4: Setting directory permissions...")
-            chmod_cmd = f"chmod -R {oct(chmod_dirs)[2:]} {remote_dir}"
+            chmod_cmd = f"chmod -R {oct(chmod_dirs)[2:]} {shlex.quote(remote_dir)}"
             ssh_manager.execute_command(chmod_cmd, timeout=60)
 
-        # Cleanup local archive
-        if os.path.exists(local_archive):
-            os.remove(local_archive)
-            logger.info(f"Cleaned up local archive: {local_archive}")
-
-        total_duration = (datetime.now() - start_time).total_seconds()
-        #  CRITICAL: Set status="completed" BEFORE cleanup
+        total_duration = time.perf_counter() - start_time
         if tracker:
             tracker.update(
                 phase="completed",
@@ -143,12 +237,6 @@ def compress_and_upload(
                 completed_files=1
             )
 
-        #  NOW run cleanup AFTER progress is completed
-        cleanup_cmd = f"rm -f {remote_archive}"
-        ssh_manager.execute_command(cleanup_cmd, timeout=30)
-        logger.info(f"Cleaned up remote archive: {remote_archive}")
-
-
         return {
             'status': 'success',
             'method': 'compressed',
@@ -166,13 +254,9 @@ def compress_and_upload(
     except Exception as e:
         logger.error(f"Compressed upload failed: {e}")
 
-        # Cleanup on error
-        if os.path.exists(local_archive):
-            os.remove(local_archive)
-
         # Try to cleanup remote archive
         try:
-            ssh_manager.execute_command(f"rm -f {remote_archive}", timeout=10)
+            ssh_manager.execute_command(f"rm -f {shlex.quote(remote_archive)}", timeout=10)
         except:
             pass
 
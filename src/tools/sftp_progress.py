@@ -10,6 +10,7 @@ Version: 1.1 - FIXED: Added field name aliases for web terminal compatibility
 """
 
 import logging
+import threading
 import time
 from typing import Optional, Callable, Dict, Any
 from datetime import datetime
@@ -181,12 +182,47 @@ class ProgressTracker:
         if status is not None:
             self.progress.status = status
         
+        self.maybe_notify()
+
+    def maybe_notify(self):
+        """
+        Push the progress to shared state if update_interval has passed.
+
+        Hot paths may set fields of self.progress directly and call this,
+        skipping update()'s keyword arguments. Not thread safe: callers
+        from several threads must serialize it with their own lock.
+        """
         # Rate-limited push to shared state
         current_time = time.time()
         if current_time - self._last_update_time >= self.update_interval:
             self._push_update()
             self._last_update_time = current_time
     
+    def wait_until_observed(self, timeout: float = 1.0):
+        """
+        Block until the web terminal has fetched the current phase.
+
+        Keeps a short phase (e.g. extracting) on screen without a fixed
+        sleep: returns once a poll has served it, after timeout at most,
+        and at once when no web terminal is polling.
+
+        Args:
+            timeout: Maximum seconds to wait
+        """
+        # Push now, ignoring the rate limit, so the phase is there to be seen
+        self._push_update()
+        self._last_update_time = time.time()
+
+        if self.shared_state and hasattr(self.shared_state, 'wait_transfer_observed'):
+            try:
+                self.shared_state.wait_transfer_observed(
+                    self.progress.transfer_id,
+                    self.progress.current_phase,
+                    timeout
+                )
+            except Exception as e:
+                logger.debug(f"Could not wait for progress to be observed: {e}")
+
     def complete(self, error: Optional[str] = None):
         """
         Mark transfer as complete or failed.
@@ -248,6 +284,80 @@ class ProgressTracker:
                         f"{self.progress.transfer_speed_mbps:.1f} MB/s)")
 
 
+class SharedTransferProgress:
+    """
+    Byte and file totals shared by the workers of a file-by-file transfer.
+
+    Chunk callbacks from all workers add to one total, written straight
+    into the tracker's TransferProgress; the tracker's own rate limit,
+    checked under the same lock, decides when it is pushed to the web
+    terminal.
+    """
+
+    def __init__(self, tracker: ProgressTracker):
+        """
+        Initialize shared progress.
+
+        Args:
+            tracker: ProgressTracker instance to update
+        """
+        self.tracker = tracker
+        self.transferred_bytes = 0
+        self.completed_files = 0
+        self._lock = threading.Lock()
+
+    def file_callback(self, rel_path: str) -> 'FileProgressCallback':
+        """Create the paramiko-style progress callback for one file"""
+        return FileProgressCallback(self, rel_path)
+
+    def file_completed(self):
+        """Count a finished file"""
+        with self._lock:
+            self.completed_files += 1
+
+    def add_bytes(self, rel_path: str, count: int):
+        """
+        Add transferred bytes and notify the tracker.
+
+        Args:
+            rel_path: File the bytes belong to
+            count: Newly transferred bytes
+        """
+        progress = self.tracker.progress
+        with self._lock:
+            self.transferred_bytes += count
+            progress.transferred_bytes = self.transferred_bytes
+            progress.completed_files = self.completed_files
+            progress.current_file = rel_path
+            progress.current_phase = "transferring"
+            progress.status = "in_progress"
+            # Under the lock as well: the tracker's rate limit is not thread
+            # safe, and a push must not read progress mid-update
+            self.tracker.maybe_notify()
+
+
+class FileProgressCallback:
+    """
+    Progress callback for one file of a SharedTransferProgress.
+
+    The file's context is bound at creation, so a late call can never
+    report a different file, and __slots__ keeps the per-file object small.
+    """
+
+    __slots__ = ('progress', 'rel_path', 'sent')
+
+    def __init__(self, progress: SharedTransferProgress, rel_path: str):
+        self.progress = progress
+        self.rel_path = rel_path
+        self.sent = 0
+
+    def __call__(self, bytes_transferred: int, total_bytes: int):
+        """Paramiko progress callback"""
+        count = bytes_transferred - self.sent
+        self.sent = bytes_transferred
+        self.progress.add_bytes(self.rel_path, count)
+
+
 def create_file_progress_callback(
     tracker: ProgressTracker,
     file_path: str,
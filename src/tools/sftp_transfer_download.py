@@ -10,12 +10,27 @@ Version: 1.2 - FIXED: Set status to "completed" when transfer finishes
 """
 
 import os
+import shutil
+import threading
+import time
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any
+
+from .sftp_progress import SharedTransferProgress
+from .sftp_transfer_pool import (
+    DEFAULT_CONCURRENCY,
+    run_on_sftp_pool,
+    shares_local_files
+)
 
 logger = logging.getLogger(__name__)
 
+# SFTP read size (paramiko's largest read request)
+_CHUNK_SIZE = 32768
+
+# Skipped file names returned in the result
+_SKIPPED_FILES_SHOWN = 20
+
 
 def execute_standard_download(
     ssh_manager,
@@ -25,10 +40,11 @@ def execute_standard_download(
     local_root: str,
     if_exists: str,
     preserve_timestamps: bool,
-    tracker
+    tracker,
+    concurrency: int = DEFAULT_CONCURRENCY
 ) -> Dict[str, Any]:
     """
-    Execute standard file-by-file download.
+    Execute standard file-by-file download over a pool of SFTP channels.
 
     Args:
         ssh_manager: SSH manager instance
@@ -39,12 +55,13 @@ def execute_standard_download(
         if_exists: Conflict resolution policy
         preserve_timestamps: Whether to preserve timestamps
         tracker: Progress tracker instance
+        concurrency: Files transferred in parallel, one SFTP channel each
 
     Returns:
         Dict with transfer statistics
     """
 
-    start_time = datetime.now()
+    start_time = time.perf_counter()
 
     stats = {
         'files_downloaded': 0,
@@ -54,16 +71,36 @@ def execute_standard_download(
         'bytes_transferred': 0
     }
 
+    # Only the first few skipped files are reported; the rest are counted
     skipped_files = []
 
+    # Shared between the pool's workers
+    lock = threading.Lock()
+    progress = SharedTransferProgress(tracker)
+
     # Ensure local root exists
     os.makedirs(local_root, exist_ok=True)
 
+    # Local directories known to exist - files sharing a parent make no
+    # directory syscall after the first
+    local_dirs = {local_root.rstrip(os.sep) or os.sep}
+
+    # When the remote root is verifiably this machine's directory, the
+    # "remote" file is a local file: copy the data in-kernel (shutil uses
+    # sendfile) instead of via SFTP
+    local_copy = shares_local_files(ssh_manager, sftp, remote_root)
+    if local_copy:
+        logger.info("Remote is this machine - copying file data locally")
+
+    # Reads are not sized from the round trip like upload writes: a capped
+    # paramiko prefetch can drain to zero in flight, after which its reads
+    # fall back to stop-and-wait while the prefetch thread keeps sending -
+    # several times slower on a LAN, where the measured depth is smallest
+
     # FIX: Set phase to transferring for standard transfers
     tracker.update(phase="transferring", status="in_progress")
 
-    # Transfer each file
-    for idx, file_info in enumerate(files):
+    def download_one(client, file_info):
         remote_path = file_info['remote_path']
         rel_path = file_info['rel_path']
         file_size = file_info['size']
@@ -72,11 +109,14 @@ def execute_standard_download(
         local_path = os.path.join(local_root, rel_path)
 
         try:
-            # Create local parent directories if needed
+            # Create local parent directories if needed, counting each one
+            # actually created (ancestors included)
             local_dir = os.path.dirname(local_path)
-            if local_dir and not os.path.exists(local_dir):
-                os.makedirs(local_dir, exist_ok=True)
-                stats['dirs_created'] += 1
+            if local_dir and local_dir not in local_dirs:
+                created = _make_local_directories(local_dir)
+                with lock:
+                    local_dirs.add(local_dir)
+                    stats['dirs_created'] += created
 
             # Check if local file exists
             file_exists = os.path.isfile(local_path)
@@ -86,35 +126,34 @@ def execute_standard_download(
             if file_exists:
                 if if_exists == "skip":
                     should_download = False
-                    stats['files_skipped'] += 1
-                    skipped_files.append(rel_path)
+                    with lock:
+                        stats['files_skipped'] += 1
+                        if len(skipped_files) < _SKIPPED_FILES_SHOWN:
+                            skipped_files.append(rel_path)
                     logger.debug(f"Skipped existing file: {local_path}")
                 elif if_exists == "overwrite" or if_exists == "merge":
-                    stats['files_overwritten'] += 1
+                    with lock:
+                        stats['files_overwritten'] += 1
 
             # Download file
             if should_download:
-                # Create progress callback for this file
-                bytes_before_transfer = stats['bytes_transferred']
-
-                def file_callback(transferred, total):
-                    tracker.update(
-                        current_file=rel_path,
-                        completed_files=idx,
-                        transferred_bytes=bytes_before_transfer + transferred,
-                        phase="transferring",
-                        status="in_progress"
-                    )
-
                 # Download with progress callback
-                sftp.get(remote_path, local_path, callback=file_callback)
+                callback = progress.file_callback(rel_path)
+                if local_copy:
+                    shutil.copyfile(remote_path, local_path)
+                    callback(file_size, file_size)
+                else:
+                    _download_file(client, remote_path, local_path, file_size, callback)
 
-                # Preserve timestamp if requested
+                # Preserve timestamp if requested - attr comes from the scan's
+                # listdir_attr, so no remote stat is needed
                 if preserve_timestamps:
                     os.utime(local_path, (attr.st_atime, attr.st_mtime))
 
-                stats['files_downloaded'] += 1
-                stats['bytes_transferred'] += file_size
+                with lock:
+                    stats['files_downloaded'] += 1
+                    stats['bytes_transferred'] += file_size
+                progress.file_completed()
 
                 logger.debug(f"Downloaded: {rel_path} ({file_size} bytes)")
 
@@ -122,7 +161,12 @@ def execute_standard_download(
             logger.error(f"Failed to download {remote_path}: {e}")
             tracker.add_error(rel_path, str(e))
 
-    duration = (datetime.now() - start_time).total_seconds()
+    # Transfer the files, one SFTP channel per worker. Largest first, so a
+    # big file never starts last while the other workers sit idle
+    largest_first = sorted(files, key=lambda f: f['size'], reverse=True)
+    run_on_sftp_pool(ssh_manager, sftp, largest_first, download_one, concurrency)
+
+    duration = time.perf_counter() - start_time
 
     # FIX: Mark transfer as completed
     tracker.update(
@@ -136,7 +180,80 @@ def execute_standard_download(
         'status': 'success',
         'method': 'standard',
         'statistics': stats,
-        'skipped_files': skipped_files[:20],  # Limit to first 20
-        'skipped_count': len(skipped_files),
+        'skipped_files': skipped_files,
+        'skipped_count': stats['files_skipped'],
         'duration': duration
     }
+
+
+def _make_local_directories(local_dir: str) -> int:
+    """
+    Create a local directory and any missing parents.
+
+    mkdir is tried first, so an existing directory costs one failed
+    syscall and no separate existence check. Safe when several workers
+    create the same directory.
+
+    Args:
+        local_dir: Local directory path
+
+    Returns:
+        Number of directories actually created
+    """
+    try:
+        os.mkdir(local_dir)
+        return 1
+    except FileExistsError:
+        return 0
+    except FileNotFoundError:
+        parent = os.path.dirname(local_dir)
+        if not parent or parent == local_dir:
+            raise
+        created = _make_local_directories(parent)
+        try:
+            os.mkdir(local_dir)
+        except FileExistsError:
+            return created
+        return created + 1
+
+
+def _download_file(
+    sftp,
+    remote_path: str,
+    local_path: str,
+    file_size: int,
+    callback
+) -> None:
+    """
+    Download one file, prefetching with the size known from the scan.
+
+    sftp.get() would stat the remote file first to learn its size; the
+    scan's listdir_attr already returned it, saving a round trip per file.
+    The prefetch is left uncapped: a capped one can run dry, and paramiko
+    then falls back to stop-and-wait reads while its prefetch thread still
+    sends. Reading stops at file_size, so no read goes past the prefetched
+    data and the prefetch thread has finished when the file is closed.
+
+    Args:
+        sftp: SFTP client
+        remote_path: Remote file to read
+        local_path: Local file to create or truncate
+        file_size: Remote file size from the scan
+        callback: Callable receiving (bytes_transferred, file_size)
+
+    Raises:
+        IOError: If the remote file ends before file_size bytes
+    """
+    with sftp.open(remote_path, 'rb') as remote_file, open(local_path, 'wb') as local_file:
+        remote_file.prefetch(file_size)
+        transferred = 0
+        while transferred < file_size:
+            data = remote_file.read(min(_CHUNK_SIZE, file_size - transferred))
+            if not data:
+                break
+            local_file.write(data)
+            transferred += len(data)
+            callback(transferred, file_size)
+
+    if transferred != file_size:
+        raise IOError(f"Size mismatch in download: got {transferred} of {file_size} bytes")
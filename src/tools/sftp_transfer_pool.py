@@ -0,0 +1,243 @@
+"""
+SFTP Channel Pool
+
+Spreads per-file transfer work over several SFTP channels opened on the
+same SSH transport, so the open/write/close round trips of different
+files overlap instead of queuing behind each other.
+"""
+
+import math
+import os
+import queue
+import secrets
+import statistics
+import tempfile
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# SFTP channels used for file-by-file transfers (capped by sshd MaxSessions)
+DEFAULT_CONCURRENCY = 8
+
+# Throughput the per-file request window is sized for (bytes/second)
+DEFAULT_TARGET_BANDWIDTH = 200_000_000
+
+# Bounds for the number of SFTP requests kept in flight per file
+_MIN_PIPELINE_DEPTH = 4
+_MAX_PIPELINE_DEPTH = 256
+
+# Round trips timed to estimate latency
+_RTT_PROBES = 3
+
+
+def pipeline_depth(
+    sftp,
+    remote_path: str,
+    request_size: int,
+    target_bandwidth: int = DEFAULT_TARGET_BANDWIDTH
+) -> int:
+    """
+    Pick the number of in-flight SFTP requests from the measured latency.
+
+    A window of rtt x bandwidth bytes keeps the link busy; a few requests
+    suffice on a LAN, a high-latency WAN link needs far more.
+
+    Args:
+        sftp: SFTP client
+        remote_path: Remote path to stat for the round-trip probes
+        request_size: Bytes carried per read/write request
+        target_bandwidth: Throughput to size the window for (bytes/second)
+
+    Returns:
+        Requests to keep in flight, between 4 and 256
+    """
+    samples = []
+    for _ in range(_RTT_PROBES):
+        start = time.perf_counter()
+        try:
+            sftp.stat(remote_path)
+        except IOError:
+            pass  # A missing path answers in one round trip as well
+        samples.append(time.perf_counter() - start)
+    rtt = statistics.median(samples)
+
+    depth = math.ceil(rtt * target_bandwidth / request_size)
+    depth = max(_MIN_PIPELINE_DEPTH, min(_MAX_PIPELINE_DEPTH, depth))
+    logger.info(f"SFTP round trip {rtt * 1000:.1f}ms - {depth} requests in flight per file")
+    return depth
+
+
+def shares_local_files(ssh_manager, sftp, remote_dir: str) -> bool:
+    """
+    Check that remote_dir over SFTP is the same directory on this machine.
+
+    ssh_manager.is_local() only says the host looks like this machine; a
+    tunnel, container or chrooted sshd on a loopback address serves a
+    different filesystem. So a marker file with random content is written
+    locally into remote_dir and must read back identically over SFTP.
+
+    Args:
+        ssh_manager: SSH manager instance
+        sftp: SFTP client
+        remote_dir: Absolute remote directory the transfer works in
+
+    Returns:
+        True when files may be copied locally instead of through SFTP
+    """
+    if not ssh_manager.is_local() or not remote_dir.startswith('/'):
+        return False
+
+    token = secrets.token_hex(16).encode()
+    try:
+        fd, marker = tempfile.mkstemp(prefix='.remote-terminal-', dir=remote_dir)
+    except OSError:
+        return False  # No such directory here, or not writable
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(token)
+        with sftp.open(marker, 'rb') as f:
+            return f.read() == token
+    except (IOError, OSError):
+        return False
+    finally:
+        try:
+            os.remove(marker)
+        except OSError:
+            pass
+
+
+@contextmanager
+def sftp_channels(ssh_manager, sftp, count: int) -> Iterator[List[Any]]:
+    """
+    Provide up to count SFTP clients on the same SSH transport.
+
+    The first client is the caller's; the others are opened with
+    ssh_manager.open_sftp() and closed on exit. When the server refuses
+    further channels (or there is no ssh_manager) fewer clients are given.
+
+    Args:
+        ssh_manager: SSH manager instance (None for just sftp)
+        sftp: The caller's SFTP client
+        count: Maximum number of clients
+
+    Yields:
+        List of SFTP clients, sftp first
+    """
+    clients = [sftp]
+    if ssh_manager is not None:
+        for _ in range(count - 1):
+            try:
+                clients.append(ssh_manager.open_sftp())
+            except Exception as e:
+                logger.warning(f"Using {len(clients)} of {count} SFTP channels: {e}")
+                break
+
+    try:
+        yield clients
+    finally:
+        for client in clients[1:]:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+
+def run_on_sftp_pool(
+    ssh_manager,
+    sftp,
+    items: List[Any],
+    work: Callable[[Any, Any], None],
+    concurrency: int = DEFAULT_CONCURRENCY
+) -> None:
+    """
+    Call work(client, item) for every item across a pool of SFTP channels.
+
+    Each worker thread owns a dedicated SFTP client from sftp_channels(),
+    so no client is shared between threads.
+
+    Args:
+        ssh_manager: SSH manager instance
+        sftp: SFTP client used by the first worker
+        items: Work items, taken in order
+        work: Callable receiving (sftp_client, item); expected to handle
+            per-item errors itself
+        concurrency: Maximum number of SFTP channels
+
+    Raises:
+        Exception: The first exception that escaped work
+    """
+    def consume(client, take):
+        item = take()
+        while item is not None:
+            work(client, item)
+            item = take()
+
+    stream_on_sftp_pool(ssh_manager, sftp, items, consume, concurrency)
+
+
+def stream_on_sftp_pool(
+    ssh_manager,
+    sftp,
+    items: List[Any],
+    consume: Callable[[Any, Callable[[], Any]], None],
+    concurrency: int = DEFAULT_CONCURRENCY
+) -> None:
+    """
+    Let each worker of a pool of SFTP channels pull items as it needs them.
+
+    Unlike run_on_sftp_pool(), a worker may take the next item before the
+    previous one is finished, so it can keep several in progress on its
+    channel at once.
+
+    Args:
+        ssh_manager: SSH manager instance
+        sftp: SFTP client used by the first worker
+        items: Work items (not None), taken in order
+        consume: Callable receiving (sftp_client, take); take() returns
+            the next item, or None once there are no more items or another
+            worker has failed
+        concurrency: Maximum number of SFTP channels
+
+    Raises:
+        Exception: The first exception that escaped consume
+    """
+    workers = max(1, min(concurrency, len(items)))
+
+    with sftp_channels(ssh_manager, sftp, workers) as clients:
+        if len(clients) == 1:
+            remaining = iter(items)
+            consume(sftp, lambda: next(remaining, None))
+            return
+
+        pending = queue.SimpleQueue()
+        for item in items:
+            pending.put(item)
+        errors = []
+
+        def take():
+            if errors:
+                return None
+            try:
+                return pending.get_nowait()
+            except queue.Empty:
+                return None
+
+        def worker(client):
+            try:
+                consume(client, take)
+            except BaseException as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(client,), daemon=True)
+                   for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
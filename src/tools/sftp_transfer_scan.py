@@ -9,12 +9,52 @@ Version: 1.0
 """
 
 import os
+import re
+import fnmatch
+import queue
 import stat
 import logging
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+from .sftp_transfer_pool import DEFAULT_CONCURRENCY, sftp_channels
 
 logger = logging.getLogger(__name__)
 
+# Local trees up to this many entries are scanned without a thread pool
+_PARALLEL_SCAN_ENTRIES = 100
+
+# Upper bound on threads scanning local subtrees in parallel
+_MAX_SCAN_WORKERS = 32
+
+
+def _exclude_matcher(exclude_patterns: List[str]) -> Callable[[str, str], bool]:
+    """
+    Build a should_exclude(rel_path, filename) check for exclude globs.
+
+    All globs are compiled once into a single alternation, so each entry
+    costs at most two regex matches whatever the number of patterns.
+
+    Args:
+        exclude_patterns: List of exclusion patterns
+
+    Returns:
+        Callable returning True when the name or relative path matches
+    """
+    if not exclude_patterns:
+        return lambda rel_path, filename: False
+
+    # Case-folded like fnmatch.fnmatch on case-insensitive platforms
+    combined = re.compile('|'.join(
+        f'(?:{fnmatch.translate(os.path.normcase(p))})' for p in exclude_patterns))
+    match = combined.match
+    normcase = os.path.normcase
+
+    def should_exclude(rel_path, filename):
+        return match(normcase(filename)) is not None or match(normcase(rel_path)) is not None
+
+    return should_exclude
+
 
 def scan_local_directory(
     local_path: str,
@@ -23,68 +63,149 @@ def scan_local_directory(
     """
     Scan local directory and collect file information.
 
+    Small trees are scanned in the calling thread; once a tree passes
+    _PARALLEL_SCAN_ENTRIES entries, the pending subtrees are scanned by a
+    thread pool so the directory reads and stats of different subtrees
+    overlap (on NFS/SMB each one is a network round trip).
+
     Args:
         local_path: Local directory to scan
         exclude_patterns: List of exclusion patterns
 
     Returns:
-        List of file dicts with 'local_path', 'rel_path', 'size'
+        List of file dicts with 'local_path', 'rel_path' ('/'-separated),
+        'size', 'atime', 'mtime'
     """
 
     files = []
 
-    # Helper to check exclusions
-    def should_exclude(rel_path, filename):
-        if not exclude_patterns:
-            return False
-
-        import fnmatch
-        for pattern in exclude_patterns:
-            if fnmatch.fnmatch(filename, pattern) or fnmatch.fnmatch(rel_path, pattern):
-                return True
-        return False
-
-    # Walk directory tree
-    for root, dirs, filenames in os.walk(local_path):
-        # Filter excluded directories
-        dirs[:] = [d for d in dirs if not should_exclude(
-            os.path.relpath(os.path.join(root, d), local_path), d
-        )]
-
-        for filename in filenames:
-            filepath = os.path.join(root, filename)
-            rel_path = os.path.relpath(filepath, local_path)
+    should_exclude = _exclude_matcher(exclude_patterns)
+
+    # Each directory carries its relative prefix, built with '/' on every
+    # platform, so relative paths are plain concatenations
+    pending = [(os.path.abspath(local_path), '')]
+    entries_seen = 0
+    while pending and entries_seen < _PARALLEL_SCAN_ENTRIES:
+        entries_seen += _scan_local_entries(pending.pop(), pending, should_exclude, files)
+
+    if len(pending) == 1:
+        _scan_local_subtree(pending[0], should_exclude, files)
+    elif pending:
+        # One task per pending subtree; the compiled exclude regex is
+        # immutable and safe to share between the workers
+        workers = min(_MAX_SCAN_WORKERS, (os.cpu_count() or 1) * 4, len(pending))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                lambda subtree: _scan_local_subtree(subtree, should_exclude, []),
+                pending))
+        for subtree_files in results:
+            files.extend(subtree_files)
+
+    return files
+
+
+def _scan_local_subtree(
+    subtree: Tuple[str, str],
+    should_exclude: Callable[[str, str], bool],
+    files: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Scan one directory and everything below it.
+
+    Args:
+        subtree: (directory path, '/'-terminated relative prefix)
+        should_exclude: Exclude check from _exclude_matcher()
+        files: List the file dicts are appended to
+
+    Returns:
+        files
+    """
+    pending = [subtree]
+    while pending:
+        _scan_local_entries(pending.pop(), pending, should_exclude, files)
+    return files
+
+
+def _scan_local_entries(
+    directory: Tuple[str, str],
+    pending: List[Tuple[str, str]],
+    should_exclude: Callable[[str, str], bool],
+    files: List[Dict[str, Any]]
+) -> int:
+    """
+    Read one directory: collect its files and queue its subdirectories.
+
+    DirEntry caches the type from the listing, and the stat of
+    non-symlinks needs no extra lookup.
+
+    Args:
+        directory: (directory path, '/'-terminated relative prefix)
+        pending: Stack the subdirectories are pushed onto
+        should_exclude: Exclude check from _exclude_matcher()
+        files: List the file dicts are appended to
+
+    Returns:
+        Number of entries in the directory
+    """
+    dir_path, rel_prefix = directory
+    try:
+        with os.scandir(dir_path) as it:
+            entries = list(it)
+    except OSError as e:
+        logger.warning(f"Cannot read directory: {e}")
+        return 0
+
+    for entry in entries:
+        filepath = entry.path
+        rel_path = rel_prefix + entry.name
+
+        try:
+            if entry.is_dir():
+                # Symlinked directories are not followed (as os.walk)
+                if not entry.is_symlink() and not should_exclude(rel_path, entry.name):
+                    pending.append((filepath, rel_path + '/'))
+                continue
 
             # Skip excluded files
-            if should_exclude(rel_path, filename):
+            if should_exclude(rel_path, entry.name):
                 logger.debug(f"Excluded: {rel_path}")
                 continue
 
-            try:
-                size = os.path.getsize(filepath)
-                files.append({
-                    'local_path': filepath,
-                    'rel_path': rel_path,
-                    'size': size
-                })
-            except Exception as e:
-                logger.warning(f"Error scanning {filepath}: {e}")
+            st = entry.stat()
+            files.append({
+                'local_path': filepath,
+                'rel_path': rel_path,
+                'size': st.st_size,
+                'atime': st.st_atime,
+                'mtime': st.st_mtime
+            })
+        except Exception as e:
+            logger.warning(f"Error scanning {filepath}: {e}")
 
-    return files
+    return len(entries)
 
 
 def scan_remote_directory(
     sftp,
     remote_path: str,
-    exclude_patterns: List[str]
+    exclude_patterns: List[str],
+    ssh_manager=None,
+    concurrency: int = DEFAULT_CONCURRENCY
 ) -> List[Dict[str, Any]]:
     """
     Scan remote directory and collect file information.
 
+    The tree is walked breadth-first: every directory of one level is
+    listed at the same time, spread over a pool of SFTP channels when
+    ssh_manager is given. listdir_attr returns each entry's attributes,
+    so no per-file stat is needed.
+
     Args:
         sftp: SFTP client
         remote_path: Remote directory to scan
         exclude_patterns: List of exclusion patterns
+        ssh_manager: Optional SSH manager to open extra SFTP channels
+        concurrency: Maximum number of SFTP channels
 
     Returns:
         List of file dicts with 'remote_path', 'rel_path', 'size', 'attr'
@@ -92,46 +213,57 @@ def scan_remote_directory(
 
     files = []
 
-    # Helper to check exclusions
-    def should_exclude(rel_path, filename):
-        if not exclude_patterns:
-            return False
+    should_exclude = _exclude_matcher(exclude_patterns)
 
-        import fnmatch
-        for pattern in exclude_patterns:
-            if fnmatch.fnmatch(filename, pattern) or fnmatch.fnmatch(rel_path, pattern):
-                return True
-        return False
+    with sftp_channels(ssh_manager, sftp, concurrency) as clients:
+        # Each listing borrows an idle client, so none is shared by threads
+        idle = queue.SimpleQueue()
+        for client in clients:
+            idle.put(client)
 
-    # Recursive scan function
-    def scan_dir(path):
-        try:
-            for attr in sftp.listdir_attr(path):
-                item_name = attr.filename
-                full_path = f"{path}/{item_name}".replace('//', '/')
-                rel_path = os.path.relpath(full_path, remote_path)
-
-                # Skip excluded items
-                if should_exclude(rel_path, item_name):
-                    logger.debug(f"Excluded: {rel_path}")
-                    continue
-
-                # Handle directories
-                if stat.S_ISDIR(attr.st_mode):
-                    scan_dir(full_path)
-
-                # Handle files
-                elif stat.S_ISREG(attr.st_mode):
-                    files.append({
-                        'remote_path': full_path,
-                        'rel_path': rel_path,
-                        'size': attr.st_size,
-                        'attr': attr
-                    })
+        def list_dir(path):
+            client = idle.get()
+            try:
+                return path, client.listdir_attr(path)
+            except Exception as e:
+                logger.error(f"Error scanning remote directory {path}: {e}")
+                return path, []
+            finally:
+                idle.put(client)
 
-        except Exception as e:
-            logger.error(f"Error scanning remote directory {path}: {e}")
+        # Directories to list, with their relative prefix
+        frontier = [(remote_path, '')]
+        with ThreadPoolExecutor(max_workers=len(clients)) as pool:
+            while frontier:
+                next_frontier = []
+
+                # map() keeps the listing order, so the result is stable
+                listings = pool.map(list_dir, [path for path, _ in frontier])
+                for (path, attrs), (_, rel_prefix) in zip(listings, frontier):
+                    dir_base = path.rstrip('/')
+                    for attr in attrs:
+                        item_name = attr.filename
+                        full_path = dir_base + '/' + item_name
+                        rel_path = rel_prefix + item_name
+
+                        # Skip excluded items
+                        if should_exclude(rel_path, item_name):
+                            logger.debug(f"Excluded: {rel_path}")
+                            continue
+
+                        # Handle directories
+                        if stat.S_ISDIR(attr.st_mode):
+                            next_frontier.append((full_path, rel_path + '/'))
+
+                        # Handle files
+                        elif stat.S_ISREG(attr.st_mode):
+                            files.append({
+                                'remote_path': full_path,
+                                'rel_path': rel_path,
+                                'size': attr.st_size,
+                                'attr': attr
+                            })
 
-    scan_dir(remote_path)
+                frontier = next_frontier
 
     return files
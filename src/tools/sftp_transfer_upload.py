@@ -9,13 +9,58 @@ Date: 2025-11-13
 Version: 1.2 - FIXED: Set status to "completed" when transfer finishes
 """
 
-import os
+import shutil
+import stat
+import threading
+import time
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+from paramiko import SFTPAttributes, SFTPClient
+from paramiko.sftp import (
+    CMD_CLOSE,
+    CMD_HANDLE,
+    CMD_OPEN,
+    CMD_SETSTAT,
+    CMD_STATUS,
+    CMD_WRITE,
+    SFTP_FLAG_CREATE,
+    SFTP_FLAG_TRUNC,
+    SFTP_FLAG_WRITE,
+    SFTPError,
+    int64
+)
+
+from .sftp_progress import SharedTransferProgress
+from .sftp_transfer_pool import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_TARGET_BANDWIDTH,
+    pipeline_depth,
+    run_on_sftp_pool,
+    shares_local_files,
+    stream_on_sftp_pool
+)
 
 logger = logging.getLogger(__name__)
 
+# Local read size per SFTP write request (paramiko's largest write request)
+_CHUNK_SIZE = 32768
+
+# Read buffer for local files - one read syscall per MiB instead of per chunk
+_LOCAL_BUFSIZE = 1024 * 1024
+
+# Skipped file names returned in the result
+_SKIPPED_FILES_SHOWN = 20
+
+# Files one SFTP channel has open at once - bounds local file descriptors
+_MAX_OPEN_FILES = 16
+
+# _AsyncTransferEngine and _set_remote_attributes drive SFTPClient's private
+# request methods (tested with paramiko 3.3 to 5.x). If a paramiko release
+# drops them, uploads fall back to the public pipelined SFTPFile path
+_PARAMIKO_INTERNALS = all(hasattr(SFTPClient, name) for name in (
+    '_async_request', '_read_response', '_request', '_convert_status', '_adjust_cwd'))
+
 
 def execute_standard_upload(
     ssh_manager,
@@ -27,15 +72,20 @@ def execute_standard_upload(
     chmod_files: Optional[int],
     chmod_dirs: Optional[int],
     preserve_timestamps: bool,
-    tracker
+    tracker,
+    chunk_size: int = _CHUNK_SIZE,
+    max_unconfirmed: Optional[int] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    target_bandwidth: int = DEFAULT_TARGET_BANDWIDTH
 ) -> Dict[str, Any]:
     """
-    Execute standard file-by-file upload.
+    Execute standard file-by-file upload over a pool of SFTP channels.
 
     Args:
         ssh_manager: SSH manager instance
         sftp: SFTP client
-        files: List of file dicts with 'local_path', 'rel_path', 'size'
+        files: List of file dicts with 'local_path', 'rel_path'
+            ('/'-separated), 'size', 'atime', 'mtime'
         local_root: Local root directory
         remote_root: Remote root directory
         if_exists: Conflict resolution policy
@@ -43,12 +93,18 @@ def execute_standard_upload(
         chmod_dirs: Optional directory permissions
         preserve_timestamps: Whether to preserve timestamps
         tracker: Progress tracker instance
+        chunk_size: Bytes read locally per write request
+        max_unconfirmed: Write requests kept in flight per SFTP channel,
+            across its files (None = sized from the measured round-trip time)
+        concurrency: Files transferred in parallel, one SFTP channel each
+        target_bandwidth: Throughput (bytes/second) the automatic request
+            window is sized for
 
     Returns:
         Dict with transfer statistics
     """
 
-    start_time = datetime.now()
+    start_time = time.perf_counter()
 
     stats = {
         'files_uploaded': 0,
@@ -58,93 +114,149 @@ def execute_standard_upload(
         'bytes_transferred': 0
     }
 
+    # Only the first few skipped files are reported; the rest are counted
     skipped_files = []
-    created_dirs = set()
 
-    # Ensure remote root exists
+    # Shared between the pool's workers
+    lock = threading.Lock()
+    progress = SharedTransferProgress(tracker)
+
+    # Remote paths are remote_base + '/' + rel_path ('/'-separated)
+    remote_base = remote_root.rstrip('/')
+
+    # Ensure remote root exists with a bare mkdir instead of stat first. A
+    # missing parent or denied permission is raised as is; on any other
+    # failure the root must already be a directory, otherwise the mkdir
+    # error is raised
+    created_dirs = []
     try:
-        sftp.stat(remote_root)
-    except FileNotFoundError:
         sftp.mkdir(remote_root)
+    except (FileNotFoundError, PermissionError):
+        raise
+    except IOError as e:
+        try:
+            is_dir = stat.S_ISDIR(sftp.stat(remote_root).st_mode)
+        except IOError:
+            is_dir = False
+        if not is_dir:
+            raise e
+    else:
         if chmod_dirs is not None:
             sftp.chmod(remote_root, chmod_dirs)
-        stats['dirs_created'] += 1
+        created_dirs.append(remote_base or '/')
         logger.info(f"Created remote root directory: {remote_root}")
 
+    # Create every remote parent directory once, parents before children -
+    # the list holds each ancestor of every file's directory
+    created_dirs += _create_remote_directories(
+        sftp, _collect_remote_directories(remote_base, files), chmod_dirs)
+    stats['dirs_created'] += len(created_dirs)
+
+    # Names in each remote directory, listed once on first use - the
+    # directories created above start out empty
+    listings = {remote_dir: set() for remote_dir in created_dirs}
+
+    # When the remote root is verifiably this machine's directory, the
+    # "remote" file is a local file: copy the data in-kernel (shutil uses
+    # sendfile) instead of via SFTP
+    local_copy = shares_local_files(ssh_manager, sftp, remote_root)
+    if local_copy:
+        logger.info("Remote is this machine - copying file data locally")
+
+    # Size the per-channel request window to the link's latency unless given
+    if max_unconfirmed is None and not local_copy:
+        max_unconfirmed = pipeline_depth(sftp, remote_root, _CHUNK_SIZE, target_bandwidth)
+
     # FIX: Set phase to transferring for standard transfers
     tracker.update(phase="transferring", status="in_progress")
 
-    # Transfer each file
-    for idx, file_info in enumerate(files):
-        local_path = file_info['local_path']
+    def admit(client, file_info) -> bool:
+        """Apply the if_exists policy - True when the file is to be sent"""
         rel_path = file_info['rel_path']
-        file_size = file_info['size']
-
-        remote_path = f"{remote_root}/{rel_path}".replace('//', '/')
+        remote_path = remote_base + '/' + rel_path
 
-        try:
-            # Create remote parent directories if needed
-            remote_dir = os.path.dirname(remote_path)
-            if remote_dir and remote_dir not in created_dirs:
-                _ensure_remote_directory(sftp, remote_dir, chmod_dirs)
-                created_dirs.add(remote_dir)
-                stats['dirs_created'] += 1
-
-            # Check if remote file exists
-            file_exists = False
+        # Check if remote file exists, from the directory's listing
+        slash = remote_path.rfind('/')
+        remote_dir = remote_path[:slash] or '/'
+        names = listings.get(remote_dir)
+        if names is None:
             try:
-                sftp.stat(remote_path)
-                file_exists = True
-            except FileNotFoundError:
-                pass
-
-            # Apply if_exists policy
-            should_upload = True
-            if file_exists:
-                if if_exists == "skip":
-                    should_upload = False
-                    stats['files_skipped'] += 1
+                names = set(client.listdir(remote_dir))
+            except IOError:
+                names = set()
+            with lock:
+                names = listings.setdefault(remote_dir, names)
+        if remote_path[slash + 1:] not in names:
+            return True
+
+        if if_exists == "skip":
+            with lock:
+                stats['files_skipped'] += 1
+                if len(skipped_files) < _SKIPPED_FILES_SHOWN:
                     skipped_files.append(rel_path)
-                    logger.debug(f"Skipped existing file: {remote_path}")
-                elif if_exists == "overwrite" or if_exists == "merge":
-                    stats['files_overwritten'] += 1
-
-            # Upload file
-            if should_upload:
-                # Create progress callback for this file
-                bytes_before_transfer = stats['bytes_transferred']
-
-                def file_callback(transferred, total):
-                    tracker.update(
-                        current_file=rel_path,
-                        completed_files=idx,
-                        transferred_bytes=bytes_before_transfer + transferred,
-                        phase="transferring",
-                        status="in_progress"
-                    )
-
-                # Upload with progress callback
-                sftp.put(local_path, remote_path, callback=file_callback)
-
-                # Apply chmod if specified
-                if chmod_files is not None:
-                    sftp.chmod(remote_path, chmod_files)
-
-                # Preserve timestamp if requested
-                if preserve_timestamps:
-                    local_stat = os.stat(local_path)
-                    sftp.utime(remote_path, (local_stat.st_atime, local_stat.st_mtime))
-
-                stats['files_uploaded'] += 1
-                stats['bytes_transferred'] += file_size
-
-                logger.debug(f"Uploaded: {rel_path} ({file_size} bytes)")
-
+            logger.debug(f"Skipped existing file: {remote_path}")
+            return False
+        if if_exists == "overwrite" or if_exists == "merge":
+            with lock:
+                stats['files_overwritten'] += 1
+        return True
+
+    def uploaded(file_info):
+        with lock:
+            stats['files_uploaded'] += 1
+            stats['bytes_transferred'] += file_info['size']
+        progress.file_completed()
+        logger.debug(f"Uploaded: {file_info['rel_path']} ({file_info['size']} bytes)")
+
+    def failed(file_info, e):
+        logger.error(f"Failed to upload {file_info['local_path']}: {e}")
+        tracker.add_error(file_info['rel_path'], str(e))
+
+    def upload_one(client, file_info):
+        if not admit(client, file_info):
+            return
+        remote_path = remote_base + '/' + file_info['rel_path']
+        try:
+            callback = progress.file_callback(file_info['rel_path'])
+            if local_copy:
+                shutil.copyfile(file_info['local_path'], remote_path)
+                callback(file_info['size'], file_info['size'])
+            else:
+                _upload_file(client, file_info['local_path'], remote_path,
+                             file_info['size'], callback, chunk_size)
+
+            # Apply chmod and preserve timestamps (captured by the scan)
+            if chmod_files is not None or preserve_timestamps:
+                _set_remote_attributes(
+                    client, remote_path, chmod_files,
+                    (file_info['atime'], file_info['mtime']) if preserve_timestamps else None
+                )
         except Exception as e:
-            logger.error(f"Failed to upload {local_path}: {e}")
-            tracker.add_error(rel_path, str(e))
-
-    duration = (datetime.now() - start_time).total_seconds()
+            failed(file_info, e)
+            return
+        uploaded(file_info)
+
+    def upload_stream(client, take):
+        def next_upload():
+            file_info = take()
+            while file_info is not None and not admit(client, file_info):
+                file_info = take()
+            return file_info
+
+        engine = _AsyncTransferEngine(
+            client, remote_base, chunk_size, max_unconfirmed, chmod_files,
+            preserve_timestamps, progress.file_callback, uploaded, failed)
+        engine.run(next_upload)
+
+    # Transfer the files, one SFTP channel per worker. Largest first, so a
+    # big file never starts last while the other workers sit idle
+    largest_first = sorted(files, key=lambda f: f['size'], reverse=True)
+    if local_copy or not _PARAMIKO_INTERNALS:
+        run_on_sftp_pool(ssh_manager, sftp, largest_first, upload_one, concurrency)
+    else:
+        stream_on_sftp_pool(ssh_manager, sftp, largest_first, upload_stream, concurrency)
+
+    duration = time.perf_counter() - start_time
 
     # FIX: Mark transfer as completed
     tracker.update(
@@ -158,36 +270,332 @@ def execute_standard_upload(
         'status': 'success',
         'method': 'standard',
         'statistics': stats,
-        'skipped_files': skipped_files[:20],  # Limit to first 20
-        'skipped_count': len(skipped_files),
+        'skipped_files': skipped_files,
+        'skipped_count': stats['files_skipped'],
         'duration': duration
     }
 
 
-def _ensure_remote_directory(sftp, remote_dir: str, chmod: Optional[int] = None):
+def _upload_file(
+    sftp,
+    local_path: str,
+    remote_path: str,
+    file_size: int,
+    callback,
+    chunk_size: int
+) -> None:
     """
-    Ensure a remote directory exists, creating parent directories as needed.
+    Upload one file with pipelined writes through the public SFTPFile API.
+
+    Fallback for paramiko versions without the internals the
+    _AsyncTransferEngine relies on. A failed write is raised on close.
 
     Args:
         sftp: SFTP client
-        remote_dir: Remote directory path
-        chmod: Optional permissions to set
+        local_path: Local file to read
+        remote_path: Remote file to create or truncate
+        file_size: Size of the local file (passed on to callback)
+        callback: Callable receiving (bytes_transferred, file_size)
+        chunk_size: Bytes read locally per write request
     """
-    # Split path into parts
-    parts = remote_dir.split('/')
-    current_path = ""
+    with open(local_path, 'rb', buffering=_LOCAL_BUFSIZE) as local_file, \
+            sftp.open(remote_path, 'wb') as remote_file:
+        remote_file.set_pipelined(True)
+        transferred = 0
+        for data in iter(lambda: local_file.read(chunk_size), b''):
+            remote_file.write(data)
+            transferred += len(data)
+            callback(transferred, file_size)
 
-    for part in parts:
-        if not part:
-            continue
 
-        current_path = f"{current_path}/{part}" if current_path else f"/{part}"
+class _AsyncTransferEngine:
+    """
+    Upload files over one SFTP channel, with requests of several files in
+    flight at once.
+
+    sftp.put() waits for each file's OPEN, last write ACKs, CLOSE and
+    SETSTAT in turn, leaving the channel idle for several round trips
+    per file. Here requests are submitted without waiting and a single
+    completion loop reads the responses, advancing each file through
+    opening -> writing -> closing. Up to max_outstanding requests are in
+    flight across all files, so one file's round trips overlap the next
+    file's writes.
+    """
 
+    def __init__(
+        self,
+        sftp,
+        remote_base: str,
+        chunk_size: int,
+        max_outstanding: int,
+        mode: Optional[int],
+        preserve_timestamps: bool,
+        file_callback: Callable[[str], Callable[[int, int], None]],
+        on_done: Callable[[Dict], None],
+        on_error: Callable[[Dict, Exception], None]
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            sftp: SFTP client used by this engine only
+            remote_base: Remote root directory without trailing '/'
+            chunk_size: Bytes read locally per write request
+            max_outstanding: Requests kept in flight across all files
+            mode: Optional permissions to set on uploaded files
+            preserve_timestamps: Whether to set the scanned atime/mtime
+            file_callback: Creates the progress callback for a rel_path
+            on_done: Called with the file dict of each uploaded file
+            on_error: Called with the file dict and error of a failed file
+        """
+        self.sftp = sftp
+        self.remote_base = remote_base
+        self.chunk_size = chunk_size
+        self.max_outstanding = max_outstanding
+        self.mode = mode
+        self.preserve_timestamps = preserve_timestamps
+        self.file_callback = file_callback
+        self.on_done = on_done
+        self.on_error = on_error
+
+        # Request number -> (_UploadState, request type, bytes written)
+        self._requests = {}
+
+    def run(self, next_file: Callable[[], Optional[Dict]]) -> None:
+        """
+        Upload files until next_file() returns None.
+
+        Per-file errors go to on_error; a lost connection is raised.
+
+        Args:
+            next_file: Returns the next file dict to upload, or None
+        """
+        active = []
+        more = True
+        try:
+            while True:
+                # Open further files while the window has room
+                while (more and len(active) < _MAX_OPEN_FILES
+                       and len(self._requests) < self.max_outstanding):
+                    file_info = next_file()
+                    if file_info is None:
+                        more = False
+                    else:
+                        state = self._open(file_info)
+                        if state is not None:
+                            active.append(state)
+
+                # Submit what each file can send now, oldest file first
+                for state in active:
+                    self._advance(state)
+                active = [state for state in active if not state.done]
+
+                if self._requests:
+                    # Read one response; paramiko hands it to _async_response
+                    self.sftp._read_response()
+                elif not active and not more:
+                    break
+        finally:
+            for state in active:
+                state.local_file.close()
+
+    def _open(self, file_info: Dict) -> Optional['_UploadState']:
+        """Open the local file and submit the remote OPEN"""
         try:
-            sftp.stat(current_path)
-        except FileNotFoundError:
-            # Directory doesn't exist, create it
-            sftp.mkdir(current_path)
-            if chmod is not None:
-                sftp.chmod(current_path, chmod)
-            logger.debug(f"Created remote directory: {current_path}")
+            local_file = open(file_info['local_path'], 'rb', buffering=_LOCAL_BUFSIZE)
+        except OSError as e:
+            self.on_error(file_info, e)
+            return None
+
+        state = _UploadState(file_info, local_file, self.file_callback(file_info['rel_path']))
+        remote_path = self.remote_base + '/' + file_info['rel_path']
+        self._submit(state, CMD_OPEN, 0, self.sftp._adjust_cwd(remote_path),
+                     SFTP_FLAG_WRITE | SFTP_FLAG_CREATE | SFTP_FLAG_TRUNC, SFTPAttributes())
+        return state
+
+    def _advance(self, state: '_UploadState') -> None:
+        """Submit the next requests of one file, or finish it"""
+        if state.handle is None:
+            # Still opening - or the OPEN failed
+            if state.pending == 0:
+                self._finish(state)
+            return
+
+        if not state.closing:
+            while (state.error is None and not state.eof
+                   and len(self._requests) < self.max_outstanding):
+                try:
+                    data = state.local_file.read(self.chunk_size)
+                except OSError as e:
+                    # Fails this file only: close it once the writes drain
+                    state.error = e
+                    break
+                if not data:
+                    state.eof = True
+                    break
+                self._submit(state, CMD_WRITE, len(data), state.handle, int64(state.offset), data)
+                state.offset += len(data)
+
+            # CLOSE and SETSTAT once every write is acknowledged, so the
+            # timestamps are not changed by a late write
+            if (state.eof or state.error is not None) and state.pending == 0:
+                state.closing = True
+                self._submit(state, CMD_CLOSE, 0, state.handle)
+                if state.error is None and (self.mode is not None or self.preserve_timestamps):
+                    attr = SFTPAttributes()
+                    if self.mode is not None:
+                        attr.st_mode = self.mode
+                    if self.preserve_timestamps:
+                        attr.st_atime = state.file_info['atime']
+                        attr.st_mtime = state.file_info['mtime']
+                    remote_path = self.remote_base + '/' + state.file_info['rel_path']
+                    self._submit(state, CMD_SETSTAT, 0, self.sftp._adjust_cwd(remote_path), attr)
+
+        elif state.pending == 0:
+            self._finish(state)
+
+    def _finish(self, state: '_UploadState') -> None:
+        """Close the local file and report the outcome"""
+        state.done = True
+        state.local_file.close()
+        if state.error is None:
+            self.on_done(state.file_info)
+        else:
+            self.on_error(state.file_info, state.error)
+
+    def _submit(self, state: '_UploadState', t: int, size: int, *args) -> None:
+        """Send a request without waiting for its response"""
+        num = self.sftp._async_request(self, t, *args)
+        self._requests[num] = (state, t, size)
+        state.pending += 1
+
+    def _async_response(self, t: int, msg, num: int) -> None:
+        """Record a response - called by paramiko's SFTPClient._read_response"""
+        request = self._requests.pop(num, None)
+        if request is None:
+            return
+        state, request_type, size = request
+        state.pending -= 1
+        try:
+            if request_type == CMD_OPEN:
+                if t == CMD_HANDLE:
+                    state.handle = msg.get_binary()
+                    return
+                if t != CMD_STATUS:
+                    raise SFTPError("Expected handle")
+                self.sftp._convert_status(msg)
+                raise SFTPError("Expected handle")
+            if t != CMD_STATUS:
+                raise SFTPError("Expected status")
+            self.sftp._convert_status(msg)
+        except Exception as e:
+            if state.error is None:
+                state.error = e
+            return
+        if request_type == CMD_WRITE:
+            state.acked += size
+            state.callback(state.acked, state.file_info['size'])
+
+
+class _UploadState:
+    """Progress of one file through an _AsyncTransferEngine"""
+
+    __slots__ = ('file_info', 'local_file', 'callback', 'handle', 'offset',
+                 'acked', 'pending', 'eof', 'closing', 'done', 'error')
+
+    def __init__(self, file_info: Dict, local_file, callback):
+        self.file_info = file_info
+        self.local_file = local_file
+        self.callback = callback
+        self.handle = None      # Remote handle once the OPEN succeeded
+        self.offset = 0         # Bytes submitted in write requests
+        self.acked = 0          # Bytes acknowledged by the server
+        self.pending = 0        # Requests in flight
+        self.eof = False
+        self.closing = False
+        self.done = False
+        self.error = None
+
+
+def _set_remote_attributes(
+    sftp,
+    remote_path: str,
+    mode: Optional[int],
+    times: Optional[Tuple[float, float]]
+) -> None:
+    """
+    Set permissions and/or timestamps of a remote file in one round trip.
+
+    sftp.chmod() and sftp.utime() each send their own SETSTAT; this sends
+    one carrying only the requested fields (or falls back to those two
+    calls when paramiko lacks the internals used for it).
+
+    Args:
+        sftp: SFTP client
+        remote_path: Remote file path
+        mode: Permissions to set, or None
+        times: (atime, mtime) to set, or None
+    """
+    if not _PARAMIKO_INTERNALS:
+        if mode is not None:
+            sftp.chmod(remote_path, mode)
+        if times is not None:
+            sftp.utime(remote_path, times)
+        return
+
+    attr = SFTPAttributes()
+    if mode is not None:
+        attr.st_mode = mode
+    if times is not None:
+        attr.st_atime, attr.st_mtime = times
+    sftp._request(CMD_SETSTAT, sftp._adjust_cwd(remote_path), attr)
+
+
+def _collect_remote_directories(remote_base: str, files: List[Dict]) -> List[str]:
+    """
+    List the remote directories below the remote root that the files need.
+
+    Args:
+        remote_base: Remote root directory without trailing '/' (the root
+            itself is created separately)
+        files: List of file dicts with '/'-separated 'rel_path'
+
+    Returns:
+        Unique directory paths, shallowest first
+    """
+    rel_dirs = set()
+    for file_info in files:
+        rel_dir = file_info['rel_path'].rpartition('/')[0]
+        # Walk up until an ancestor is already known or the root is reached
+        while rel_dir and rel_dir not in rel_dirs:
+            rel_dirs.add(rel_dir)
+            rel_dir = rel_dir.rpartition('/')[0]
+    return [remote_base + '/' + rel_dir
+            for rel_dir in sorted(rel_dirs, key=lambda d: d.count('/'))]
+
+
+def _create_remote_directories(sftp, remote_dirs: List[str], chmod: Optional[int] = None) -> List[str]:
+    """
+    Create remote directories with one mkdir each and no existence check.
+
+    A directory that already exists makes mkdir fail, which is ignored.
+
+    Args:
+        sftp: SFTP client
+        remote_dirs: Directory paths, parents before children
+        chmod: Optional permissions to set on created directories
+
+    Returns:
+        The directories actually created
+    """
+    created = []
+    for remote_dir in remote_dirs:
+        try:
+            sftp.mkdir(remote_dir)
+        except IOError:
+            continue
+        if chmod is not None:
+            sftp.chmod(remote_dir, chmod)
+        created.append(remote_dir)
+        logger.debug(f"Created remote directory: {remote_dir}")
+    return created
@@ -70,7 +70,8 @@ async def _select_server(shared_state, hosts_manager, database, web_server, iden
         )]
 
     # Wait for welcome message to fully arrive before fetching machine_id
-    time.sleep(1.0)
+    # (yield to the event loop rather than blocking it)
+    await asyncio.sleep(1.0)
 
     # ========== GET MACHINE_ID AND HOSTNAME WITH RETRY LOGIC ==========
     host = srv.host
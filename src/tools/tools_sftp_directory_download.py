@@ -94,7 +94,7 @@ async def sftp_download_directory(
     except FileNotFoundError:
         raise SFTPFileNotFoundError(f"Remote directory not found: {remote_path}")
 
-    files = scan_remote_directory(sftp, remote_path, exclude_patterns)
+    files = scan_remote_directory(sftp, remote_path, exclude_patterns, ssh_manager=ssh_manager)
 
     if not files:
         return {
@@ -136,6 +136,24 @@ class WebTerminalServer:
         """
         await self._ws_manager.broadcast_transfer_update(transfer_id, progress)
 
+    def schedule_transfer_update(self, transfer_id: str, progress: dict) -> None:
+        """
+        Schedule a transfer progress broadcast from any thread
+
+        SFTP progress callbacks run outside the web server's event loop, so the
+        broadcast is submitted to the WebSocket loop thread-safely.
+
+        Args:
+            transfer_id: Transfer identifier
+            progress: Progress information dict
+        """
+        loop = self._ws_manager.loop
+        if loop is None or loop.is_closed():
+            return  # No WebSocket client has connected yet
+        asyncio.run_coroutine_threadsafe(
+            self.broadcast_transfer_update(transfer_id, progress), loop
+        )
+
     def _run_web_server(self):
         """Run NiceGUI web server (runs in separate thread)"""
         try:
@@ -175,7 +193,12 @@ class WebTerminalServer:
             def handle_active_transfers():
                 """Get active SFTP transfer progress"""
                 try:
-                    transfers = self.shared_state.get_active_transfers()
+                    # Cheap emptiness check on the live view; copy only when needed
+                    if not self.shared_state.get_active_transfers():
+                        return JSONResponse({'transfers': {}})
+                    transfers = self.shared_state.snapshot_transfers()
+                    # Releases a worker waiting for its phase to be shown
+                    self.shared_state.mark_transfers_observed(transfers)
                     return JSONResponse({'transfers': transfers})
                 except Exception as e:
                     logger.error(f"Error getting active transfers: {e}")
@@ -5,7 +5,7 @@ WebSocket broadcast and communication for multi-terminal synchronization
 
 import asyncio
 import logging
-from typing import Set
+from typing import Optional, Set
 import threading
 
 logger = logging.getLogger(__name__)
@@ -25,6 +25,9 @@ class WebSocketManager:
         self.active_websockets: Set = set()
         self._ws_lock = threading.Lock()
         self._broadcast_task = None
+        # Event loop serving the WebSockets, captured on first connection so
+        # other threads can schedule broadcasts onto it
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
 
     async def handle_websocket(self, websocket):
         """
@@ -34,6 +37,9 @@ class WebSocketManager:
         Args:
             websocket: WebSocket connection from client
         """
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+
         # Add to active connections
         with self._ws_lock:
             self.active_websockets.add(websocket)
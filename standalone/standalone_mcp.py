@@ -244,6 +244,8 @@ if __name__ == "__main__":
         if g_shared_state and g_shared_state.ssh_manager:
             print("Disconnecting SSH...")
             g_shared_state.ssh_manager.disconnect()
+            from ssh.ssh_pool import SSHConnectionPool
+            SSHConnectionPool.close_all()
 
         if g_db_manager:
             print("Closing database...")
@@ -196,8 +196,7 @@ async def select_server_endpoint(request, g_shared_state, g_hosts_manager,
         if result_json.get('connected'):
             # Clear buffer and queue after server switch
             g_shared_state.buffer.clear()
-            with g_shared_state.output_lock:
-                g_shared_state.output_queue.clear()
+            g_shared_state.output_queue.clear()
 
             # Send newline to get fresh prompt
             time.sleep(0.5)
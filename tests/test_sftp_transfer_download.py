@@ -0,0 +1,141 @@
+"""
+Standard download against a loopback paramiko SFTP server.
+
+Every remote chunk must be read once by the prefetch; synchronous
+fallback READs would show up as extra requests at the server.
+"""
+
+import math
+import os
+import socket
+import threading
+
+import paramiko
+from paramiko import (
+    AUTH_SUCCESSFUL,
+    OPEN_SUCCEEDED,
+    SFTP_OK,
+    SFTPAttributes,
+    SFTPHandle,
+    SFTPServer,
+    SFTPServerInterface,
+    ServerInterface,
+)
+
+from tools.sftp_progress import ProgressTracker, TransferProgress
+from tools.sftp_transfer_download import execute_standard_download
+from tools.sftp_transfer_scan import scan_remote_directory
+
+_READ_SIZE = 32768
+
+
+class _CountingHandle(SFTPHandle):
+    reads = 0
+    lock = threading.Lock()
+
+    def read(self, offset, length):
+        with _CountingHandle.lock:
+            _CountingHandle.reads += 1
+        return super().read(offset, length)
+
+
+class _LocalSFTP(SFTPServerInterface):
+    def list_folder(self, path):
+        try:
+            result = []
+            for name in os.listdir(path):
+                attr = SFTPAttributes.from_stat(os.lstat(os.path.join(path, name)))
+                attr.filename = name
+                result.append(attr)
+            return result
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def stat(self, path):
+        try:
+            return SFTPAttributes.from_stat(os.stat(path))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    lstat = stat
+
+    def open(self, path, flags, attr):
+        try:
+            f = open(path, 'rb')
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        handle = _CountingHandle(flags)
+        handle.readfile = f
+        return handle
+
+    def canonicalize(self, path):
+        return os.path.normpath(path)
+
+
+class _Server(ServerInterface):
+    def check_auth_password(self, username, password):
+        return AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_channel_request(self, kind, chanid):
+        return OPEN_SUCCEEDED
+
+
+class _LoopbackManager:
+    """Minimal ssh_manager: SFTP clients over an in-process transport"""
+
+    def __init__(self):
+        server_sock, client_sock = socket.socketpair()
+        self.server = paramiko.Transport(server_sock)
+        self.server.add_server_key(paramiko.RSAKey.generate(2048))
+        self.server.set_subsystem_handler('sftp', SFTPServer, _LocalSFTP)
+        self.server.start_server(event=threading.Event(), server=_Server())
+        self.client = paramiko.Transport(client_sock)
+        self.client.connect(username='user', password='password')
+
+    def open_sftp(self):
+        return paramiko.SFTPClient.from_transport(self.client)
+
+    def is_local(self):
+        return False
+
+    def close(self):
+        self.client.close()
+        self.server.close()
+
+
+def test_download_reads_each_chunk_once(tmp_path):
+    remote_root = tmp_path / 'remote'
+    local_root = tmp_path / 'local'
+    remote_root.mkdir()
+    sizes = [1_500_000 + i * 4099 for i in range(6)] + [0, 100]
+    for i, size in enumerate(sizes):
+        (remote_root / f'file{i}.bin').write_bytes(os.urandom(size))
+
+    manager = _LoopbackManager()
+    try:
+        sftp = manager.open_sftp()
+        files = scan_remote_directory(sftp, str(remote_root), [], ssh_manager=manager)
+        tracker = ProgressTracker(TransferProgress(
+            transfer_id='test', transfer_type='download', source=str(remote_root),
+            destination=str(local_root), method='standard', status='starting',
+            total_files=len(files), total_bytes=sum(sizes)))
+
+        _CountingHandle.reads = 0
+        result = execute_standard_download(
+            manager, sftp, files, str(remote_root), str(local_root),
+            'overwrite', False, tracker, concurrency=4)
+        sftp.close()
+    finally:
+        manager.close()
+
+    assert result['statistics']['files_downloaded'] == len(sizes)
+    assert not tracker.progress.errors_list
+    for i in range(len(sizes)):
+        name = f'file{i}.bin'
+        assert (local_root / name).read_bytes() == (remote_root / name).read_bytes()
+
+    # One READ per chunk - no stop-and-wait reads beside the prefetch
+    assert _CountingHandle.reads == sum(math.ceil(size / _READ_SIZE) for size in sizes)
@@ -0,0 +1,34 @@
+"""
+SSHManager.execute_on_many fan-out.
+"""
+
+from ssh.ssh_manager import SSHManager
+
+
+def _manager(host, port, user, output=None, error=None):
+    manager = SSHManager(host=host, user=user, password='', port=port)
+
+    def execute_simple(command, timeout=10):
+        if error is not None:
+            raise error
+        return f"{output}: {command}"
+
+    manager.execute_simple = execute_simple
+    return manager
+
+
+def test_execute_on_many_keeps_managers_for_one_host_apart():
+    managers = [
+        _manager('10.0.0.5', 22, 'alice', output='a'),
+        _manager('10.0.0.5', 2222, 'alice', output='b'),
+        _manager('10.0.0.5', 22, 'bob', error=OSError('refused')),
+        _manager('10.0.0.6', 22, 'alice', output='c'),
+    ]
+
+    results = SSHManager.execute_on_many(managers, 'uptime')
+
+    assert results == ['a: uptime', 'b: uptime', '', 'c: uptime']
+
+
+def test_execute_on_many_without_managers():
+    assert SSHManager.execute_on_many([], 'uptime') == []